@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -9,6 +10,60 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     BANK_ADMIN_SECRET: str
 
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_SOCKET_TIMEOUT_MS: int = 30000
+    MONGO_COMPRESSORS: str = "zlib"
+    # Where heavy read-only admin endpoints are served from. Anything other
+    # than primary may return slightly stale data
+    MONGO_ADMIN_READ_PREFERENCE: Literal[
+        "primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"
+    ] = "primary"
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Both are per API worker: each runs its own OCR process pool
+    OCR_WORKERS: int = 2
+    OCR_MAX_JOBS: int = 8
+    OCR_MAX_UPLOAD_BYTES: int = 5 * 1024 * 1024
+
+    LOG_LEVEL: str = "INFO"
+    # Fraction of INFO records kept per logger, e.g. {"smartbank.transfer": 0.1}
+    LOG_SAMPLE_RATES: dict = {"smartbank.transfer": 0.1}
+
+    # Batch concurrent transfers into one commit: flush after the window or
+    # once LEDGER_GROUP_MAX transfers are waiting, whichever comes first
+    LEDGER_GROUP_COMMIT: bool = False
+    LEDGER_GROUP_WINDOW_MS: float = 2
+    LEDGER_GROUP_MAX: int = 64
+
+    # Transfers scoring at or above FLAG are marked on the ledger row. With
+    # RISK_HOLDS on, those at or above HOLD are rejected and queued in
+    # risk_holds for review; by default scoring only flags
+    RISK_SCORING: bool = True
+    RISK_HOLDS: bool = False
+    RISK_FLAG_THRESHOLD: float = 4.0
+    RISK_HOLD_THRESHOLD: float = 8.0
+
+    # Shards of the bank-wide daily analytics bucket; more shards means
+    # fewer write conflicts between concurrent transfers
+    ROLLUP_GLOBAL_SHARDS: int = 16
+
+    # "local" publishes account events in-process after each transfer;
+    # "change_stream" feeds them from Mongo so every worker sees every event
+    EVENTS_SOURCE: str = "local"
+
+    # Log requests slower than this with their Mongo commands; 0 disables
+    SLOW_REQUEST_MS: int = 0
+
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    # Evict cached principals on every worker via a Mongo change stream
+    PRINCIPAL_CACHE_SYNC: bool = False
+
     class Config:
         env_file = ".env"
 
@@ -1,26 +1,93 @@
+from bson import ObjectId
+from bson.errors import InvalidId
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.db.change_streams import watch_forever
 from app.db.mongodb import get_db
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+# str(_id) -> cache key, so writers that only know the _id can evict.
+# Entries live exactly as long as the principal they point at
+_principal_keys = {}
+
+
+def _drop_principal_key(key, user):
+    user_id = str(user["_id"])
+    if _principal_keys.get(user_id) == key:
+        del _principal_keys[user_id]
+
+
+# (role, token subject) -> principal document
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    on_evict=_drop_principal_key
+)
+
+
+def invalidate_principal(user_id):
+    key = _principal_keys.pop(str(user_id), None)
+    if key:
+        principal_cache.pop(key)
+
+
+async def _load_principal(db, role: str, subject: str):
+    # User tokens carry the email as subject, admin tokens the admin _id
+    if role == "user":
+        return await db.users.find_one({"email": subject})
+
+    try:
+        return await db.admins.find_one({"_id": ObjectId(subject)})
+    except InvalidId:
+        return None
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)):
     try:
         payload = jwt.decode(
             token,
             settings.JWT_SECRET,
             algorithms=[settings.JWT_ALGORITHM]
         )
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
         )
 
+    if payload.get("purpose"):
+        # Single-purpose tickets (see create_events_ticket) are not sessions
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+
+    subject = payload.get("sub")
+    role = payload.get("role")
+    key = (role, subject)
+
+    user = principal_cache.get(key)
+    if user is None:
+        user = await _load_principal(db, role, subject)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token"
+            )
+
+        user["role"] = role
+        _principal_keys[str(user["_id"])] = key
+        principal_cache.set(key, user)
+
+    # Handlers get their own copy so they cannot mutate the cached entry
+    return dict(user)
+
+
 def is_admin(user=Depends(get_current_user)):
     if user.get("role") != "admin":
         raise HTTPException(
@@ -30,29 +97,38 @@ def is_admin(user=Depends(get_current_user)):
     return user
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)):
+def clear_principals():
+    principal_cache.clear()
+    _principal_keys.clear()
+
+
+async def watch_principal_changes(db):
+    # Cross-worker invalidation: every worker tails the users change stream
+    # and evicts the owner of any changed user document. The principal is
+    # the user document alone (primary_account included), so account
+    # writes, balance updates above all, never need to evict it. If the
+    # stream could not resume, evictions may have been missed, so the
+    # whole cache is dropped.
+    await watch_forever(
+        db.users,
+        [{"$match": {"operationType": {"$in": ["update", "replace", "delete"]}}}],
+        lambda change: invalidate_principal(change["documentKey"]["_id"]),
+        on_gap=clear_principals
+    )
+
+
+def read_events_ticket(ticket: str) -> ObjectId:
     try:
         payload = jwt.decode(
-            token,
+            ticket,
             settings.JWT_SECRET,
             algorithms=[settings.JWT_ALGORITHM]
         )
-        email = payload.get("sub")
-        role = payload.get("role")
-
-        if role == "user":
-            user = await db.users.find_one({"email": email})
-        else:
-            user = await db.admins.find_one({"email": email})
-
-        if not user:
-            raise Exception()
-
-        user["role"] = role
-        return user
-
-    except Exception:
+        if payload.get("purpose") != "events":
+            raise JWTError()
+        return ObjectId(payload["sub"])
+    except (JWTError, KeyError, InvalidId):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
\ No newline at end of file
+            detail="Invalid ticket"
+        )
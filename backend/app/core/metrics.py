@@ -0,0 +1,171 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict
+from pymongo import monitoring
+from app.core.config import settings
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+slow_log = logging.getLogger("smartbank.slow")
+
+# Mongo commands issued while handling the current request, for the slow log
+_captured_queries = contextvars.ContextVar("captured_queries", default=None)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.total += 1
+        self.sum += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+
+    def lines(self, name: str, labels: str):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.total}'
+        yield f"{name}_sum{{{labels}}} {self.sum:.6f}"
+        yield f"{name}_count{{{labels}}} {self.total}"
+
+
+class Metrics:
+    def __init__(self):
+        self.in_flight = 0
+        self.request_latency = defaultdict(Histogram)
+        self.responses = defaultdict(int)
+        self.db_latency = defaultdict(Histogram)
+        self.db_failures = defaultdict(int)
+
+    def render(self):
+        lines = [
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), hist in sorted(self.request_latency.items()):
+            lines += hist.lines(
+                "http_request_duration_seconds",
+                f'method="{method}",route="{route}"'
+            )
+
+        lines.append("# TYPE http_responses_total counter")
+        for (method, route, status), count in sorted(self.responses.items()):
+            lines.append(
+                f'http_responses_total{{method="{method}",route="{route}",status="{status}"}} {count}'
+            )
+
+        lines.append("# TYPE mongo_command_duration_seconds histogram")
+        for (collection, command), hist in sorted(self.db_latency.items()):
+            lines += hist.lines(
+                "mongo_command_duration_seconds",
+                f'collection="{collection}",command="{command}"'
+            )
+
+        lines.append("# TYPE mongo_command_failures_total counter")
+        for (collection, command), count in sorted(self.db_failures.items()):
+            lines.append(
+                f'mongo_command_failures_total{{collection="{collection}",command="{command}"}} {count}'
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    # Times every command the driver sends, keyed by collection and verb
+
+    def __init__(self):
+        self._pending = {}
+        # Motor runs the driver on executor threads
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        value = event.command.get(event.command_name)
+        collection = value if isinstance(value, str) else "-"
+        self._pending[(event.connection_id, event.request_id)] = (
+            collection,
+            _captured_queries.get()
+        )
+
+    def _finish(self, event, failed: bool):
+        collection, captured = self._pending.pop(
+            (event.connection_id, event.request_id), ("-", None)
+        )
+        key = (collection, event.command_name)
+        seconds = event.duration_micros / 1_000_000
+        with self._lock:
+            metrics.db_latency[key].observe(seconds)
+            if failed:
+                metrics.db_failures[key] += 1
+        if captured is not None:
+            captured.append({
+                "collection": collection,
+                "command": event.command_name,
+                "ms": round(seconds * 1000, 2),
+                "failed": failed
+            })
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+
+mongo_listener = MongoCommandListener()
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware so streaming responses are timed to their end
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        captured = [] if settings.SLOW_REQUEST_MS else None
+        token = _captured_queries.set(captured)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight -= 1
+            _captured_queries.reset(token)
+
+            # Label by route template, not raw path, to keep cardinality fixed
+            route = scope.get("route")
+            path = route.path if route else "unmatched"
+            method = scope["method"]
+
+            metrics.request_latency[(method, path)].observe(elapsed)
+            metrics.responses[(method, path, status)] += 1
+
+            if captured is not None and elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+                slow_log.warning(
+                    "slow request %s %s %d %.1fms queries=%s",
+                    method, path, status, elapsed * 1000, captured
+                )
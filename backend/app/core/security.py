@@ -1,14 +1,83 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import jwt
 import bcrypt
 from app.core.config import settings
 
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the
+# event loop without the pickling cost of a process pool
+_password_pool = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="bcrypt"
+)
+# Updated from the bcrypt threads and the event loop alike
+_pool_stats = {"queued": 0, "running": 0, "completed": 0}
+_pool_stats_lock = threading.Lock()
+
+
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode(), salt).decode()
 
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode(), hashed.encode())
 
+def needs_rehash(hashed: str) -> bool:
+    # "$2b$12$..." -> 12
+    try:
+        return int(hashed.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def _tracked(fn, *args):
+    with _pool_stats_lock:
+        _pool_stats["queued"] -= 1
+        _pool_stats["running"] += 1
+    try:
+        return fn(*args)
+    finally:
+        with _pool_stats_lock:
+            _pool_stats["running"] -= 1
+            _pool_stats["completed"] += 1
+
+
+async def _run_in_pool(fn, *args):
+    with _pool_stats_lock:
+        _pool_stats["queued"] += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_pool, _tracked, fn, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_pool(hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await _run_in_pool(verify_password, password, hashed)
+
+
+def password_pool_stats():
+    with _pool_stats_lock:
+        return {"workers": settings.PASSWORD_HASH_WORKERS, **_pool_stats}
+
+
+async def authenticate(collection, email: str, password: str):
+    # Returns the matching document, upgrading its hash when the
+    # configured cost factor has changed since it was stored
+    doc = await collection.find_one({"email": email})
+    if not doc or not await verify_password_async(password, doc["password"]):
+        return None
+
+    if needs_rehash(doc["password"]):
+        await collection.update_one(
+            {"_id": doc["_id"]},
+            {"$set": {"password": await hash_password_async(password)}}
+        )
+
+    return doc
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(
@@ -20,3 +89,21 @@ def create_access_token(data: dict):
         settings.JWT_SECRET,
         algorithm=settings.JWT_ALGORITHM
     )
+
+
+EVENTS_TICKET_SECONDS = 30
+
+
+def create_events_ticket(user_id) -> str:
+    # EventSource can only authenticate through the URL, which ends up in
+    # access logs and browser history, so it gets a short-lived ticket
+    # that is good for nothing but /user/events instead of the access token
+    return jwt.encode(
+        {
+            "sub": str(user_id),
+            "purpose": "events",
+            "exp": datetime.utcnow() + timedelta(seconds=EVENTS_TICKET_SECONDS)
+        },
+        settings.JWT_SECRET,
+        algorithm=settings.JWT_ALGORITHM
+    )
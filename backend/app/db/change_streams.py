@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from pymongo.errors import OperationFailure
+
+RETRY_INITIAL_SECONDS = 1
+RETRY_MAX_SECONDS = 30
+# ChangeStreamHistoryLost, InvalidResumeToken, ChangeStreamFatalError
+UNRESUMABLE_CODES = {260, 280, 286}
+
+log = logging.getLogger("smartbank.change_streams")
+
+
+async def watch_forever(collection, pipeline, handle, on_gap=None, **watch_kwargs):
+    # Keeps one change stream open across failovers, invalidations and
+    # network errors. It resumes from the last token it processed with
+    # capped exponential backoff, and calls on_gap when events may have
+    # been missed (no usable token) so callers can resynchronise.
+    resume_token = None
+    delay = RETRY_INITIAL_SECONDS
+
+    while True:
+        try:
+            async with collection.watch(
+                pipeline, resume_after=resume_token, **watch_kwargs
+            ) as stream:
+                delay = RETRY_INITIAL_SECONDS
+                async for change in stream:
+                    try:
+                        handle(change)
+                    except Exception:
+                        log.exception("change handler failed on %s", collection.name)
+                    resume_token = stream.resume_token
+
+            # The stream only ends on invalidate (drop or rename); its token
+            # cannot be resumed after
+            log.warning("change stream on %s was invalidated", collection.name)
+            resume_token = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            if isinstance(exc, OperationFailure) and exc.code in UNRESUMABLE_CODES:
+                resume_token = None
+            log.exception(
+                "change stream on %s failed, retrying in %ss",
+                collection.name, delay
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX_SECONDS)
+
+        if resume_token is None and on_gap:
+            on_gap()
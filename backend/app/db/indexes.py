@@ -0,0 +1,79 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+OCR_JOB_TTL_SECONDS = 3600
+# How long a bulk payout's Idempotency-Key keeps replaying its response
+BULK_REQUEST_TTL_SECONDS = 24 * 3600
+
+# Every index the routes rely on. create_indexes is a no-op for indexes that
+# already exist with the same spec, so this is safe to apply on each startup.
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+        IndexModel(
+            [("name_normalized", ASCENDING), ("_id", ASCENDING)],
+            name="name_normalized"
+        ),
+        IndexModel([("name_trigrams", ASCENDING)], name="name_trigrams"),
+    ],
+    "admins": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+    ],
+    "accounts": [
+        IndexModel(
+            [("account_number", ASCENDING)],
+            unique=True,
+            name="account_number_unique"
+        ),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "transactions": [
+        IndexModel(
+            [("from_account", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+            name="from_account_timestamp"
+        ),
+        IndexModel(
+            [("to_account", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+            name="to_account_timestamp"
+        ),
+        IndexModel(
+            [("timestamp", DESCENDING), ("_id", DESCENDING)],
+            name="timestamp"
+        ),
+        IndexModel(
+            [("timestamp", DESCENDING), ("amount", ASCENDING)],
+            name="timestamp_amount"
+        ),
+        IndexModel(
+            [("sender_id", ASCENDING), ("idempotency_key", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"idempotency_key": {"$exists": True}},
+            name="idempotency_key_unique"
+        ),
+    ],
+    "ocr_jobs": [
+        IndexModel(
+            [("created_at", ASCENDING)],
+            expireAfterSeconds=OCR_JOB_TTL_SECONDS,
+            name="created_at_ttl"
+        ),
+    ],
+    "bulk_requests": [
+        IndexModel(
+            [("created_at", ASCENDING)],
+            expireAfterSeconds=BULK_REQUEST_TTL_SECONDS,
+            name="created_at_ttl"
+        ),
+    ],
+    "analytics": [
+        IndexModel(
+            [("scope", ASCENDING), ("day", ASCENDING)],
+            unique=True,
+            name="scope_day_unique"
+        ),
+    ],
+}
+
+
+async def ensure_indexes(db):
+    for collection, indexes in INDEXES.items():
+        await db[collection].create_indexes(indexes)
@@ -1,8 +1,57 @@
+import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
 from app.core.config import settings
+from app.core.metrics import mongo_listener
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+client = None
+db = None
+read_db = None
+
+
+async def connect_to_mongo():
+    global client, db, read_db
+    client = AsyncIOMotorClient(
+        settings.MONGO_URI,
+        maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+        connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+        serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS,
+        compressors=settings.MONGO_COMPRESSORS,
+        event_listeners=[mongo_listener]
+    )
+    db = client[settings.DATABASE_NAME]
+    read_db = client.get_database(
+        settings.DATABASE_NAME,
+        read_preference=READ_PREFERENCES[settings.MONGO_ADMIN_READ_PREFERENCE]
+    )
+
+    # Open minPoolSize connections up front so the first requests after a
+    # deploy do not pay for TCP and TLS handshakes
+    await asyncio.gather(*(
+        db.command("ping") for _ in range(max(settings.MONGO_MIN_POOL_SIZE, 1))
+    ))
+
+
+def close_mongo_connection():
+    global client, db, read_db
+    if client is not None:
+        client.close()
+    client = db = read_db = None
 
-client = AsyncIOMotorClient(settings.MONGO_URI)
-db = client[settings.DATABASE_NAME]
 
 def get_db():
     return db
+
+
+def get_read_db():
+    return read_db
@@ -0,0 +1,126 @@
+# Query-plan regression check: exits non-zero if any query the routes issue
+# is planned as a collection scan. Run from backend/:
+#
+#     python -m app.db.query_plans
+#
+import asyncio
+import sys
+from datetime import datetime
+from bson import ObjectId
+from app.db.indexes import ensure_indexes
+from app.db.mongodb import close_mongo_connection, connect_to_mongo, get_db
+from app.utils.pagination import encode_cursor, page_query
+
+SAMPLE_ACCOUNT = "SBK000000000"
+SAMPLE_CURSOR = encode_cursor({"timestamp": datetime.utcnow(), "_id": ObjectId()})
+
+PAGE_SORT = [("timestamp", -1), ("_id", -1)]
+
+
+def account_history(account_number: str):
+    return {
+        "$or": [
+            {"from_account": account_number},
+            {"to_account": account_number}
+        ]
+    }
+
+
+# (name, collection, filter, sort) for each hot query; aggregations are
+# listed by their leading $match and the key each $lookup joins on
+QUERIES = [
+    ("login user", "users", {"email": "probe@example.com"}, None),
+    ("login admin", "admins", {"email": "probe@example.com"}, None),
+    ("principal by id", "users", {"_id": ObjectId()}, None),
+    ("account by number", "accounts", {"account_number": SAMPLE_ACCOUNT}, None),
+    ("account by user", "accounts", {"user_id": ObjectId()}, None),
+    (
+        "name prefix search",
+        "users",
+        {"name_normalized": {"$regex": "^probe"}},
+        [("name_normalized", 1), ("_id", 1)]
+    ),
+    ("name fuzzy search", "users", {"name_trigrams": {"$in": ["pro", "rob"]}}, None),
+    ("search lookup", "accounts", {"user_id": {"$in": [ObjectId()]}}, None),
+    ("history lookup", "accounts", {"account_number": {"$in": [SAMPLE_ACCOUNT]}}, None),
+    ("user history", "transactions", account_history(SAMPLE_ACCOUNT), PAGE_SORT),
+    (
+        "user history next page",
+        "transactions",
+        page_query(account_history(SAMPLE_ACCOUNT), SAMPLE_CURSOR),
+        PAGE_SORT
+    ),
+    ("admin feed", "transactions", {}, PAGE_SORT),
+    (
+        "admin feed date and amount filter",
+        "transactions",
+        {
+            "timestamp": {"$gte": datetime(2024, 1, 1), "$lt": datetime(2024, 2, 1)},
+            "amount": {"$gte": 1000}
+        },
+        PAGE_SORT
+    ),
+    (
+        "account counterparty filter",
+        "transactions",
+        {"$or": [
+            {"from_account": SAMPLE_ACCOUNT, "to_account": "SBK000000018"},
+            {"from_account": "SBK000000018", "to_account": SAMPLE_ACCOUNT}
+        ]},
+        PAGE_SORT
+    ),
+    ("admin feed next page", "transactions", page_query({}, SAMPLE_CURSOR), PAGE_SORT),
+    (
+        "analytics range",
+        "analytics",
+        {"scope": {"$regex": "^global:"}, "day": {"$gte": "2024-01-01", "$lte": "2024-12-31"}},
+        None
+    ),
+    (
+        "idempotent replay",
+        "transactions",
+        {"sender_id": ObjectId(), "idempotency_key": "probe"},
+        None
+    ),
+]
+
+
+def find_stages(plan, stage: str):
+    if isinstance(plan, dict):
+        if plan.get("stage") == stage:
+            yield plan
+        for value in plan.values():
+            yield from find_stages(value, stage)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from find_stages(item, stage)
+
+
+async def collscans(db):
+    failures = []
+    for name, collection, query, sort in QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = await cursor.explain()
+        winning = plan["queryPlanner"]["winningPlan"]
+        if any(find_stages(winning, "COLLSCAN")):
+            failures.append(name)
+    return failures
+
+
+async def main():
+    await connect_to_mongo()
+    db = get_db()
+    await ensure_indexes(db)
+    failures = await collscans(db)
+    close_mongo_connection()
+
+    for name, *_ in QUERIES:
+        print(f"{'COLLSCAN' if name in failures else 'ok':8} {name}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
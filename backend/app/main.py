@@ -1,14 +1,55 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from app.core.config import settings
+from app.core.dependencies import watch_principal_changes
+from app.db.indexes import ensure_indexes
+from app.db.mongodb import close_mongo_connection, connect_to_mongo, get_db
+from app.services.event_service import watch_account_events
+from app.services.ocr_service import shutdown_ocr_pool
+from app.services.search_service import backfill_search_fields
 from app.routes import health
 from app.routes import auth, admin, health, account, transaction
-from app.routes import user
+from app.routes import user, metrics
+from app.core.logging import RequestIdMiddleware, setup_logging
+from app.core.metrics import MetricsMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener = setup_logging()
+    await connect_to_mongo()
+    db = get_db()
+    await ensure_indexes(db)
+    await backfill_search_fields(db)
+
+    watchers = []
+    if settings.PRINCIPAL_CACHE_SYNC:
+        watchers.append(asyncio.create_task(watch_principal_changes(db)))
+    if settings.EVENTS_SOURCE == "change_stream":
+        watchers.append(asyncio.create_task(watch_account_events(db)))
+
+    try:
+        yield
+    finally:
+        for watcher in watchers:
+            watcher.cancel()
+            # A watcher that died with an error must not skip the teardown
+            with suppress(asyncio.CancelledError, Exception):
+                await watcher
+
+        try:
+            shutdown_ocr_pool()
+            close_mongo_connection()
+        finally:
+            log_listener.stop()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -18,6 +59,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(auth.router)
 app.include_router(admin.router)
@@ -25,6 +68,7 @@ app.include_router(account.router)
 app.include_router(health.router)
 app.include_router(transaction.router)
 app.include_router(user.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def root():
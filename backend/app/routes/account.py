@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.schemas.account import AccountCreateRequest, AccountResponse
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, invalidate_principal
 from app.db.mongodb import get_db
 from app.services.account_service import create_account
 
@@ -20,6 +20,7 @@ async def create_new_account(
         user_id=user["_id"],
         account_type=data.account_type
     )
+    invalidate_principal(user["_id"])
 
     return {
         "account_number": account["account_number"],
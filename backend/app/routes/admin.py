@@ -1,11 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from app.schemas.admin import AdminSignupRequest
 from app.schemas.auth import LoginRequest, TokenResponse
-from app.core.security import hash_password, verify_password, create_access_token
+from app.schemas.transaction import LedgerRow, TransactionFilters
+from app.services.history_service import compile_filters, filtered_totals
+from app.core.security import hash_password_async, authenticate, create_access_token
 from app.core.config import settings
-from app.core.dependencies import is_admin
-from app.db.mongodb import get_db
+from app.core.dependencies import is_admin, invalidate_principal
+from app.db.mongodb import get_db, get_read_db
+from app.utils.pagination import MAX_PAGE_SIZE, fetch_page
+from app.utils.response import FastJSONResponse
+from app.services.account_service import reassign_primary_account
+from app.services.rollup_service import GLOBAL_SCOPE, summarize
+from app.services.search_service import (
+    MAX_SEARCH_RESULTS,
+    fuzzy_search,
+    prefix_search,
+    search_rows
+)
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -26,7 +40,7 @@ async def admin_signup(data: AdminSignupRequest, db=Depends(get_db)):
 
     admin = {
         "email": data.email,
-        "password": hash_password(data.password),
+        "password": await hash_password_async(data.password),
         "name": data.name,
         "role": "admin"
     }
@@ -43,8 +57,8 @@ async def admin_signup(data: AdminSignupRequest, db=Depends(get_db)):
 
 @router.post("/login", response_model=TokenResponse)
 async def admin_login(data: LoginRequest, db=Depends(get_db)):
-    admin = await db.admins.find_one({"email": data.email})
-    if not admin or not verify_password(data.password, admin["password"]):
+    admin = await authenticate(db.admins, data.email, data.password)
+    if not admin:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -56,78 +70,74 @@ async def admin_login(data: LoginRequest, db=Depends(get_db)):
     })
 
     return {"access_token": token}
-@router.get("/search")
+@router.get("/search", response_class=FastJSONResponse)
 async def search_user(
     query: str,
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+    cursor: Optional[str] = None,
+    fuzzy: bool = False,
     admin=Depends(is_admin),
-    db=Depends(get_db)
+    db=Depends(get_read_db)
 ):
     # Search by account number
     account = await db.accounts.find_one({"account_number": query})
 
     if account:
         user = await db.users.find_one({"_id": account["user_id"]})
-        return {
-            "name": user["name"],
-            "email": user["email"],
-            "account_number": account["account_number"],
-            "account_type": account["account_type"],
-            "balance": account["balance"],
-            "daily_limit": account["daily_limit"],
-            "is_active": account["is_active"]
-        }
+        user["accounts"] = [account]
+        return FastJSONResponse({"items": search_rows([user]), "next_cursor": None})
 
     # Search by user name
-    cursor = db.users.find({"name": {"$regex": query, "$options": "i"}})
-    results = []
-
-    async for user in cursor:
-        acc = await db.accounts.find_one({"user_id": user["_id"]})
-        if acc:
-            results.append({
-                "name": user["name"],
-                "email": user["email"],
-                "account_number": acc["account_number"],
-                "account_type": acc["account_type"],
-                "balance": acc["balance"],
-                "daily_limit": acc["daily_limit"],
-                "is_active": acc["is_active"]
-            })
+    next_cursor = None
+    if fuzzy:
+        results = await fuzzy_search(db, query, limit)
+    else:
+        results, next_cursor = await prefix_search(db, query, limit, cursor)
 
     if not results:
         raise HTTPException(status_code=404, detail="No records found")
 
-    return results
+    return FastJSONResponse({"items": results, "next_cursor": next_cursor})
 
-@router.get("/user/{account_number}")
+@router.get("/user/{account_number}", response_class=FastJSONResponse)
 async def view_user(
     account_number: str,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    filters: TransactionFilters = Depends(),
     admin=Depends(is_admin),
-    db=Depends(get_db)
+    db=Depends(get_read_db)
 ):
     account = await db.accounts.find_one({"account_number": account_number})
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
+    query = compile_filters(filters, account_number)
+
+    if filters.count_only:
+        return await filtered_totals(db, query, account_number)
+
     user = await db.users.find_one({"_id": account["user_id"]})
 
-    cursor = db.transactions.find({
-        "$or": [
-            {"from_account": account_number},
-            {"to_account": account_number}
-        ]
-    }).sort("timestamp", -1)
+    txs, next_cursor = await fetch_page(
+        db.transactions,
+        query,
+        limit=limit,
+        cursor=cursor,
+        projection={"from_account": 1, "to_account": 1, "amount": 1, "timestamp": 1}
+    )
 
-    transactions = []
-    async for tx in cursor:
-        transactions.append({
+    transactions: list[LedgerRow] = [
+        {
             "from_account": tx["from_account"],
             "to_account": tx["to_account"],
             "amount": tx["amount"],
             "time": tx["timestamp"]
-        })
+        }
+        for tx in txs
+    ]
 
-    return {
+    return FastJSONResponse({
         "name": user["name"],
         "email": user["email"],
         "phone": user.get("phone"),
@@ -140,8 +150,9 @@ async def view_user(
             "daily_limit": account["daily_limit"],
             "is_active": account["is_active"]
         },
-        "transactions": transactions
-    }
+        "transactions": transactions,
+        "next_cursor": next_cursor
+    })
 
 @router.delete("/account/{account_number}")
 async def delete_account(
@@ -149,14 +160,18 @@ async def delete_account(
     admin=Depends(is_admin),
     db=Depends(get_db)
 ):
-    result = await db.accounts.update_one(
+    account = await db.accounts.find_one_and_update(
         {"account_number": account_number},
-        {"$set": {"is_active": False}}
+        {"$set": {"is_active": False}, "$inc": {"version": 1}},
+        projection={"user_id": 1}
     )
 
-    if result.matched_count == 0:
+    if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
+    await reassign_primary_account(db, account["user_id"], account_number)
+    invalidate_principal(account["user_id"])
+
     return {"message": "Account deactivated successfully"}
 class UpdateLimitRequest(BaseModel):
     account_number: str
@@ -169,12 +184,34 @@ async def update_limit(
     admin=Depends(is_admin),
     db=Depends(get_db)
 ):
-    result = await db.accounts.update_one(
+    account = await db.accounts.find_one_and_update(
         {"account_number": data.account_number},
-        {"$set": {"daily_limit": data.new_limit}}
+        {"$set": {"daily_limit": data.new_limit}, "$inc": {"version": 1}},
+        projection={"user_id": 1}
     )
 
-    if result.matched_count == 0:
+    if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
+    invalidate_principal(account["user_id"])
+
     return {"message": "Daily limit updated"}
+
+
+@router.get("/analytics")
+async def analytics(
+    start: date,
+    end: date,
+    account_number: Optional[str] = None,
+    admin=Depends(is_admin),
+    db=Depends(get_db)
+):
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    return await summarize(
+        db,
+        scope=account_number or GLOBAL_SCOPE,
+        start_day=start.isoformat(),
+        end_day=end.isoformat()
+    )
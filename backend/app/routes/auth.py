@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.schemas.auth import SignupRequest, LoginRequest, TokenResponse
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import hash_password_async, authenticate, create_access_token
 from app.db.mongodb import get_db
+from app.services.search_service import search_fields
 from fastapi.security import OAuth2PasswordRequestForm
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -17,10 +18,11 @@ async def user_signup(data: SignupRequest, db=Depends(get_db)):
 
     user = {
         "email": data.email,
-        "password": hash_password(data.password),
+        "password": await hash_password_async(data.password),
         "name": data.name,
         "role": "user",
-        "kyc_completed": False
+        "kyc_completed": False,
+        **search_fields(data.name)
     }
 
     await db.users.insert_one(user)
@@ -35,8 +37,8 @@ async def user_signup(data: SignupRequest, db=Depends(get_db)):
 
 @router.post("/login", response_model=TokenResponse)
 async def user_login(data: LoginRequest, db=Depends(get_db)):
-    user = await db.users.find_one({"email": data.email})
-    if not user or not verify_password(data.password, user["password"]):
+    user = await authenticate(db.users, data.email, data.password)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -54,8 +56,8 @@ async def oauth_login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db=Depends(get_db)
 ):
-    user = await db.users.find_one({"email": form_data.username})
-    if not user or not verify_password(form_data.password, user["password"]):
+    user = await authenticate(db.users, form_data.username, form_data.password)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
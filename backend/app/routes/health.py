@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from app.core.security import password_pool_stats
 
 router = APIRouter(prefix="/health", tags=["Health"])
 
@@ -7,4 +8,4 @@ router = APIRouter(prefix="/health", tags=["Health"])
     operation_id="health_check"
 )
 def health_check():
-    return {"status": "OK"}
+    return {"status": "OK", "password_pool": password_pool_stats()}
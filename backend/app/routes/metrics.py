@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import metrics
+from app.core.security import password_pool_stats
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    pool = password_pool_stats()
+    return metrics.render() + (
+        "# TYPE password_hash_queue_depth gauge\n"
+        f"password_hash_queue_depth {pool['queued']}\n"
+        "# TYPE password_hash_running gauge\n"
+        f"password_hash_running {pool['running']}\n"
+    )
@@ -1,16 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.schemas.transaction import TransferRequest
+import logging
+from datetime import date
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.schemas.transaction import (
+    TransferRequest,
+    BulkTransferRequest,
+    HistoryRow,
+    TransactionFilters
+)
 from app.core.dependencies import get_current_user, is_admin
-from app.db.mongodb import get_db
-from app.services.transaction_service import transfer_money
+from app.db.mongodb import get_db, get_read_db
+from app.services.transaction_service import transfer_money, bulk_transfer
+from app.services.history_service import (
+    resolve_account_names,
+    admin_feed_pipeline,
+    compile_filters,
+    admin_row,
+    stream_admin_feed,
+    statement_query,
+    stream_statement
+)
+from app.utils.response import FastJSONResponse
+from app.utils.pagination import (
+    MAX_PAGE_SIZE,
+    fetch_merged_page,
+    page_query,
+    split_page
+)
 
 router = APIRouter(prefix="/transaction", tags=["Transaction"])
 
+transfer_log = logging.getLogger("smartbank.transfer")
+
 
 # ===================== USER TRANSFER =====================
 @router.post("/transfer")
 async def transfer(
     data: TransferRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     user=Depends(get_current_user),
     db=Depends(get_db)
 ):
@@ -21,47 +49,94 @@ async def transfer(
         db=db,
         sender=user,
         to_account_number=data.to_account_number,
-        amount=data.amount
+        amount=data.amount,
+        idempotency_key=idempotency_key,
+        from_account_number=data.from_account_number
     )
 
+    transfer_log.info("transfer", extra={"fields": {
+        "transaction_id": str(tx["_id"]),
+        "from_account": tx["from_account"],
+        "to_account": tx["to_account"],
+        "amount": tx["amount"]
+    }})
+
     return {
         "message": "Transfer successful",
         "transaction_id": str(tx["_id"])
     }
 
 
+# ===================== BULK TRANSFER =====================
+@router.post("/bulk")
+async def bulk(
+    data: BulkTransferRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    user=Depends(get_current_user),
+    db=Depends(get_db)
+):
+    if user["role"] != "user":
+        raise HTTPException(status_code=403, detail="Only users can transfer")
+
+    return await bulk_transfer(
+        db=db,
+        sender=user,
+        rows=data.transfers,
+        mode=data.mode,
+        from_account_number=data.from_account_number,
+        idempotency_key=idempotency_key
+    )
+
+
 # ===================== USER TRANSACTION HISTORY =====================
-@router.get("/history")
+@router.get("/history", response_class=FastJSONResponse)
 async def user_history(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    account_number: Optional[str] = None,
     user=Depends(get_current_user),
     db=Depends(get_db)
 ):
-    account = await db.accounts.find_one({"user_id": user["_id"]})
-    if not account:
+    # All of the user's accounts by default, or just one of them
+    query = {"user_id": user["_id"]}
+    if account_number:
+        query["account_number"] = account_number
+
+    own = {
+        acc["account_number"]
+        async for acc in db.accounts.find(query, {"account_number": 1})
+    }
+    if not own:
         raise HTTPException(status_code=404, detail="Account not found")
 
-    cursor = db.transactions.find({
-        "$or": [
-            {"from_account": account["account_number"]},
-            {"to_account": account["account_number"]}
-        ]
-    }).sort("timestamp", -1)
+    txs, next_cursor = await fetch_merged_page(
+        db.transactions,
+        [
+            {
+                "$or": [
+                    {"from_account": number},
+                    {"to_account": number}
+                ]
+            }
+            for number in own
+        ],
+        limit=limit,
+        cursor=cursor
+    )
 
-    history = []
+    names = await resolve_account_names(
+        db,
+        [tx["to_account"] for tx in txs if tx["from_account"] in own]
+    )
 
-    async for tx in cursor:
-        if tx["from_account"] == account["account_number"]:
-            # DEBIT
-            receiver = await db.accounts.find_one(
-                {"account_number": tx["to_account"]}
-            )
-            receiver_user = (
-                await db.users.find_one({"_id": receiver["user_id"]})
-                if receiver else None
-            )
+    history: list[HistoryRow] = []
 
+    for tx in txs:
+        if tx["from_account"] in own:
+            # DEBIT
             history.append({
-                "name": receiver_user["name"] if receiver_user else "Unknown",
+                "id": str(tx["_id"]),
+                "name": names.get(tx["to_account"], "Unknown"),
                 "account_number": tx["to_account"],
                 "amount": tx["amount"],
                 "type": "debit",
@@ -70,50 +145,98 @@ async def user_history(
         else:
             # CREDIT
             history.append({
+                "id": str(tx["_id"]),
                 "name": "Self",
-                "account_number": account["account_number"],
+                "account_number": tx["to_account"],
                 "amount": tx["amount"],
                 "type": "credit",
                 "time": tx["timestamp"]
             })
 
-    return history
+    return FastJSONResponse({"items": history, "next_cursor": next_cursor})
 
 
 # ===================== ADMIN TRANSACTION HISTORY =====================
-@router.get("/history/admin")
+@router.get("/history/admin", response_class=FastJSONResponse)
 async def admin_history(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    filters: TransactionFilters = Depends(),
     admin=Depends(is_admin),
-    db=Depends(get_db)
+    db=Depends(get_read_db)
 ):
-    cursor = db.transactions.find().sort("timestamp", -1)
-    history = []
+    query = compile_filters(filters)
 
-    async for tx in cursor:
-        from_acc = await db.accounts.find_one(
-            {"account_number": tx["from_account"]}
-        )
-        to_acc = await db.accounts.find_one(
-            {"account_number": tx["to_account"]}
-        )
+    if filters.count_only:
+        return {"count": await db.transactions.count_documents(query)}
 
-        from_user = (
-            await db.users.find_one({"_id": from_acc["user_id"]})
-            if from_acc else None
-        )
-        to_user = (
-            await db.users.find_one({"_id": to_acc["user_id"]})
-            if to_acc else None
+    if stream:
+        return StreamingResponse(
+            stream_admin_feed(db, page_query(query, cursor)),
+            media_type="application/x-ndjson"
         )
 
-        history.append({
-            "from_name": from_user["name"] if from_user else "Unknown",
-            "from_account": tx["from_account"],
-            "to_name": to_user["name"] if to_user else "Unknown",
-            "to_account": tx["to_account"],
-            "amount": tx["amount"],
-            "type": "transfer",
-            "time": tx["timestamp"]
-        })
-
-    return history
+    txs = await db.transactions.aggregate(
+        admin_feed_pipeline(page_query(query, cursor), limit=limit + 1)
+    ).to_list(length=limit + 1)
+
+    txs, next_cursor = split_page(txs, limit)
+
+    return FastJSONResponse({
+        "items": [admin_row(tx) for tx in txs],
+        "next_cursor": next_cursor
+    })
+
+
+# ===================== STATEMENT EXPORT =====================
+def _statement_response(db, account_number: str, query: dict, fmt: str):
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    filename = f"statement_{account_number}.{fmt}"
+    return StreamingResponse(
+        stream_statement(db, account_number, query, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/export")
+async def user_export(
+    format: Literal["csv", "ndjson"] = "csv",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    type: Optional[Literal["credit", "debit"]] = None,
+    account_number: Optional[str] = None,
+    user=Depends(get_current_user),
+    db=Depends(get_db)
+):
+    # Defaults to the primary account; any other must belong to the user
+    query = {"user_id": user["_id"]}
+    if account_number or user.get("primary_account"):
+        query["account_number"] = account_number or user["primary_account"]
+
+    account = await db.accounts.find_one(query, {"account_number": 1}, sort=[("_id", 1)])
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    account_number = account["account_number"]
+    query = statement_query(account_number, start, end, type)
+    return _statement_response(db, account_number, query, format)
+
+
+@router.get("/export/admin/{account_number}")
+async def admin_export(
+    account_number: str,
+    format: Literal["csv", "ndjson"] = "csv",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    type: Optional[Literal["credit", "debit"]] = None,
+    admin=Depends(is_admin),
+    db=Depends(get_db)
+):
+    account = await db.accounts.find_one({"account_number": account_number})
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    query = statement_query(account_number, start, end, type)
+    return _statement_response(db, account_number, query, format)
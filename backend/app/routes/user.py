@@ -1,11 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.core.dependencies import get_current_user
+import asyncio
+import hashlib
+from fastapi import APIRouter, Depends, File, HTTPException, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.dependencies import get_current_user, invalidate_principal, read_events_ticket
+from app.core.security import create_events_ticket
 from app.db.mongodb import get_db
 from app.utils.pan_validator import is_valid_pan
 from app.schemas.user import KYCRequest
+from app.services.event_service import hub
+from app.utils.response import FastJSONResponse, dumps
+from app.services.ocr_service import get_ocr_job, submit_ocr_job
 
 router = APIRouter(prefix="/user", tags=["User"])
 
+EVENT_HEARTBEAT_SECONDS = 15
+
+@router.post("/kyc/ocr")
+async def submit_pan_image(
+    file: UploadFile = File(...),
+    user=Depends(get_current_user),
+    db=Depends(get_db)
+):
+    image = await file.read(settings.OCR_MAX_UPLOAD_BYTES + 1)
+    if len(image) > settings.OCR_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Image too large")
+
+    job_id = await submit_ocr_job(db, user["_id"], image)
+    return {"job_id": job_id, "status": "queued"}
+
+@router.get("/kyc/ocr/{job_id}")
+async def pan_image_status(
+    job_id: str,
+    user=Depends(get_current_user),
+    db=Depends(get_db)
+):
+    job = await get_ocr_job(db, job_id, user["_id"])
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "pan_number": job["pan_number"],
+        "error": job["error"]
+    }
+
 @router.post("/kyc")
 async def submit_kyc(
     data: KYCRequest,
@@ -15,6 +52,15 @@ async def submit_kyc(
     if not is_valid_pan(data.pan_number):
         raise HTTPException(status_code=400, detail="Invalid PAN format")
 
+    ocr_verified = False
+    if data.ocr_job_id:
+        job = await get_ocr_job(db, data.ocr_job_id, user["_id"])
+        if job["status"] != "done":
+            raise HTTPException(status_code=409, detail="OCR still in progress")
+        if job["pan_number"] != data.pan_number:
+            raise HTTPException(status_code=400, detail="PAN does not match uploaded card")
+        ocr_verified = True
+
     await db.users.update_one(
         {"_id": user["_id"]},
         {
@@ -22,46 +68,123 @@ async def submit_kyc(
                 "pan_number": data.pan_number,
                 "address": data.address,
                 "phone": data.phone,
-                "pan_verified": True,
+                "pan_verified": ocr_verified,
                 "kyc_completed": True
             }
         }
     )
+    invalidate_principal(user["_id"])
 
     return {
-        "message": "KYC completed successfully (OCR disabled)"
+        "message": "KYC completed successfully",
+        "pan_verified": ocr_verified
     }
 
+DASHBOARD_ACCOUNT_FIELDS = {
+    "_id": 0,
+    "account_number": 1,
+    "account_type": 1,
+    "balance": 1,
+    "daily_limit": 1,
+    "is_active": 1,
+    "version": 1
+}
+
+
+def dashboard_etag(user, accounts) -> str:
+    # Every account write bumps version and the principal is evicted on
+    # KYC and account creation, so these fields change whenever the
+    # response body would
+    parts = [
+        str(user["_id"]),
+        str(user.get("kyc_completed", False)),
+        user.get("primary_account") or "-"
+    ]
+    for account in accounts:
+        parts.append(account["account_number"])
+        parts.append(str(account.get("version", 0)))
+    return '"' + hashlib.sha1(":".join(parts).encode()).hexdigest() + '"'
+
+
 @router.get("/dashboard")
 async def get_dashboard(
+    request: Request,
     user=Depends(get_current_user),
     db=Depends(get_db)
 ):
-    # Fetch user
-    db_user = await db.users.find_one({"_id": user["_id"]})
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    # Fetch account (assuming 1 account per user for now)
-    account = await db.accounts.find_one({"user_id": user["_id"]})
-
-    if not account:
-        return {
-            "name": db_user.get("name"),
-            "email": db_user.get("email"),
-            "kyc_completed": db_user.get("kyc_completed", False),
-            "account": None
-        }
+    # The whole portfolio in one query on the user_id index
+    accounts = await db.accounts.find(
+        {"user_id": user["_id"]},
+        DASHBOARD_ACCOUNT_FIELDS
+    ).sort("_id", 1).to_list(length=None)
 
-    return {
-        "name": db_user.get("name"),
-        "email": db_user.get("email"),
-        "kyc_completed": db_user.get("kyc_completed", False),
-        "account": {
-            "account_number": account["account_number"],
-            "account_type": account["account_type"],
-            "balance": account["balance"],
-            "daily_limit": account["daily_limit"],
-            "is_active": account["is_active"]
-        }
+    etag = dashboard_etag(user, accounts)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    for account in accounts:
+        account.pop("version", None)
+
+    # "account" stays the primary account for clients that show only one
+    primary = next(
+        (acc for acc in accounts if acc["account_number"] == user.get("primary_account")),
+        accounts[0] if accounts else None
+    )
+
+    body = {
+        "name": user.get("name"),
+        "email": user.get("email"),
+        "kyc_completed": user.get("kyc_completed", False),
+        "account": primary,
+        "accounts": accounts,
+        "total_balance": sum(acc["balance"] for acc in accounts)
     }
+
+    return FastJSONResponse(body, headers=headers)
+
+
+async def _event_stream(request: Request, queue, account_numbers):
+    try:
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), EVENT_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle stream
+                yield b": heartbeat\n\n"
+                continue
+            yield b"event: " + event["type"].encode() + b"\ndata: " + dumps(event) + b"\n\n"
+    finally:
+        hub.unsubscribe(queue, account_numbers)
+
+
+@router.post("/events/ticket")
+async def events_ticket(user=Depends(get_current_user)):
+    if user["role"] != "user":
+        raise HTTPException(status_code=403, detail="Only users have account events")
+    return {"ticket": create_events_ticket(user["_id"])}
+
+
+@router.get("/events")
+async def account_events(
+    request: Request,
+    ticket: str,
+    db=Depends(get_db)
+):
+    # EventSource cannot set headers, so it authenticates with a ticket from
+    # /user/events/ticket; the access token never appears in a URL
+    user_id = read_events_ticket(ticket)
+
+    account_numbers = [
+        acc["account_number"]
+        async for acc in db.accounts.find({"user_id": user_id}, {"account_number": 1})
+    ]
+    if not account_numbers:
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    queue = hub.subscribe(account_numbers)
+    return StreamingResponse(
+        _event_stream(request, queue, account_numbers),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
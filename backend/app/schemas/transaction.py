@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import List, Literal, Optional, TypedDict
 
 # class TransactionCreateRequest(BaseModel):
 #     to_account_number: str
@@ -23,4 +24,53 @@ class AdminTransactionResponse(BaseModel):
     
 class TransferRequest(BaseModel):
     to_account_number: str
-    amount: float
\ No newline at end of file
+    amount: float
+    from_account_number: Optional[str] = None
+
+class BulkTransferRow(BaseModel):
+    to_account_number: str
+    amount: float
+
+class BulkTransferRequest(BaseModel):
+    transfers: List[BulkTransferRow] = Field(min_length=1, max_length=1000)
+    mode: Literal["atomic", "best_effort"] = "atomic"
+    from_account_number: Optional[str] = None
+
+class TransactionFilters(BaseModel):
+    start: Optional[date] = None
+    end: Optional[date] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    # Relative to the account being viewed; ignored on the global feed
+    direction: Optional[Literal["credit", "debit"]] = None
+    counterparty: Optional[str] = None
+    count_only: bool = False
+
+# Lean row shapes for the list endpoints; TypedDicts document the payload
+# without per-row model validation on responses with thousands of rows
+class HistoryRow(TypedDict):
+    id: str
+    name: str
+    account_number: str
+    amount: float
+    type: str
+    time: datetime
+
+class AdminHistoryRow(TypedDict):
+    from_name: str
+    from_account: str
+    to_name: str
+    to_account: str
+    amount: float
+    type: str
+    time: datetime
+
+class LedgerRow(TypedDict):
+    from_account: str
+    to_account: str
+    amount: float
+    time: datetime
+
+class Page(TypedDict):
+    items: list
+    next_cursor: Optional[str]
@@ -1,6 +1,8 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class KYCRequest(BaseModel):
     pan_number: str
     address: str
     phone: str
+    ocr_job_id: Optional[str] = None
@@ -1,4 +1,5 @@
-from app.utils.account_number import generate_account_number
+from pymongo.errors import DuplicateKeyError
+from app.utils.account_number import account_numbers
 
 ACCOUNT_LIMITS = {
     "savings": 50000,
@@ -7,20 +8,56 @@ ACCOUNT_LIMITS = {
 }
 
 async def create_account(db, user_id: str, account_type: str):
-    account_number = generate_account_number()
-
-    # Ensure uniqueness
-    while await db.accounts.find_one({"account_number": account_number}):
-        account_number = generate_account_number()
-
     account = {
         "user_id": user_id,
-        "account_number": account_number,
         "account_type": account_type,
         "balance": 5000,
         "daily_limit": ACCOUNT_LIMITS[account_type],
-        "is_active": True
+        "is_active": True,
+        "spent_today": 0,
+        "spend_date": None,
+        "version": 0
     }
 
-    await db.accounts.insert_one(account)
+    # Allocated numbers are unique by construction; the unique index only
+    # has to catch clashes with legacy randomly generated numbers
+    while True:
+        account["account_number"] = await account_numbers.next(db)
+        try:
+            await db.accounts.insert_one(account)
+            break
+        except DuplicateKeyError:
+            account.pop("_id", None)
+
+    if account_type != "fd":
+        # The first account that can transfer becomes the default source,
+        # so transfers without an explicit source need no account lookup
+        await db.users.update_one(
+            {"_id": user_id, "primary_account": {"$exists": False}},
+            {"$set": {"primary_account": account["account_number"]}}
+        )
     return account
+
+
+async def reassign_primary_account(db, user_id, account_number: str):
+    # When the primary account stops being able to transfer, the oldest
+    # remaining active non-FD account takes over as the default source
+    replacement = await db.accounts.find_one(
+        {
+            "user_id": user_id,
+            "account_number": {"$ne": account_number},
+            "is_active": True,
+            "account_type": {"$ne": "fd"}
+        },
+        {"account_number": 1},
+        sort=[("_id", 1)]
+    )
+    if replacement:
+        update = {"$set": {"primary_account": replacement["account_number"]}}
+    else:
+        update = {"$unset": {"primary_account": ""}}
+
+    await db.users.update_one(
+        {"_id": user_id, "primary_account": account_number},
+        update
+    )
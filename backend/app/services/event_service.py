@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from collections import defaultdict
+from app.db.change_streams import watch_forever
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+log = logging.getLogger("smartbank.events")
+
+
+class EventHub:
+    # Fans one feed of account events out to every connected subscriber.
+    # The feed is either published in-process after each transfer or read
+    # from a single shared change stream, never one stream per connection.
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, account_numbers):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        for number in account_numbers:
+            self._subscribers[number].add(queue)
+        return queue
+
+    def unsubscribe(self, queue, account_numbers):
+        for number in account_numbers:
+            subscribers = self._subscribers.get(number)
+            if subscribers:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[number]
+
+    def publish(self, account_number: str, event: dict):
+        for queue in self._subscribers.get(account_number, ()):
+            if queue.full():
+                # A slow client loses the backlog and is told to refetch
+                # rather than holding unbounded memory
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync"})
+            else:
+                queue.put_nowait(event)
+
+    def resync_all(self):
+        # Events may have been missed; every client refetches
+        for queue in {q for queues in self._subscribers.values() for q in queues}:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"type": "resync"})
+
+    def publish_transaction(self, tx):
+        row = {
+            "type": "transaction",
+            "id": str(tx["_id"]),
+            "from_account": tx["from_account"],
+            "to_account": tx["to_account"],
+            "amount": tx["amount"],
+            "time": tx["timestamp"]
+        }
+        self.publish(tx["from_account"], row)
+        if tx["to_account"] != tx["from_account"]:
+            self.publish(tx["to_account"], row)
+
+    def publish_balance(self, account_number: str, balance: float):
+        self.publish(account_number, {
+            "type": "balance",
+            "account_number": account_number,
+            "balance": balance
+        })
+
+
+hub = EventHub()
+
+
+async def watch_account_events(db):
+    # Shared change-stream feed for multi-worker deployments; each worker
+    # runs one watcher per collection regardless of how many clients it has
+    def balance(change):
+        account = change.get("fullDocument")
+        if account:
+            hub.publish_balance(account["account_number"], account["balance"])
+
+    def ledger(change):
+        hub.publish_transaction(change["fullDocument"])
+
+    await asyncio.gather(
+        watch_forever(
+            db.accounts,
+            [{"$match": {
+                "operationType": "update",
+                "updateDescription.updatedFields.balance": {"$exists": True}
+            }}],
+            balance,
+            on_gap=hub.resync_all,
+            full_document="updateLookup"
+        ),
+        watch_forever(
+            db.transactions,
+            [{"$match": {"operationType": "insert"}}],
+            ledger,
+            on_gap=hub.resync_all
+        ),
+    )
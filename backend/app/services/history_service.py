@@ -0,0 +1,253 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from app.schemas.transaction import AdminHistoryRow, TransactionFilters
+from app.utils.response import dumps
+
+STREAM_BATCH_SIZE = 500
+NAME_CACHE_SIZE = 10000
+
+STATEMENT_COLUMNS = ["time", "type", "name", "account_number", "amount"]
+
+
+async def resolve_account_names(db, account_numbers):
+    # One $lookup round trip for the whole page instead of two find_one per row
+    account_numbers = list(set(account_numbers))
+    if not account_numbers:
+        return {}
+
+    cursor = db.accounts.aggregate([
+        {"$match": {"account_number": {"$in": account_numbers}}},
+        {"$lookup": {
+            "from": "users",
+            "localField": "user_id",
+            "foreignField": "_id",
+            "as": "user"
+        }},
+        {"$project": {
+            "_id": 0,
+            "account_number": 1,
+            "name": {"$first": "$user.name"}
+        }}
+    ])
+
+    names = {}
+    async for row in cursor:
+        names[row["account_number"]] = row.get("name") or "Unknown"
+    return names
+
+
+def _lookup_owner_name(prefix: str):
+    # accounts.account_number -> users.name, evaluated server-side
+    return [
+        {"$lookup": {
+            "from": "accounts",
+            "localField": f"{prefix}_account",
+            "foreignField": "account_number",
+            "as": f"{prefix}_acc"
+        }},
+        {"$lookup": {
+            "from": "users",
+            "localField": f"{prefix}_acc.user_id",
+            "foreignField": "_id",
+            "as": f"{prefix}_user"
+        }},
+    ]
+
+
+def admin_feed_pipeline(match: dict, limit: int = None):
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"timestamp": -1, "_id": -1}},
+    ]
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+
+    pipeline += _lookup_owner_name("from") + _lookup_owner_name("to")
+    pipeline.append({"$project": {
+        "from_name": {"$ifNull": [{"$first": "$from_user.name"}, "Unknown"]},
+        "from_account": 1,
+        "to_name": {"$ifNull": [{"$first": "$to_user.name"}, "Unknown"]},
+        "to_account": 1,
+        "amount": 1,
+        "timestamp": 1
+    }})
+    return pipeline
+
+
+def admin_row(tx) -> AdminHistoryRow:
+    return {
+        "from_name": tx["from_name"],
+        "from_account": tx["from_account"],
+        "to_name": tx["to_name"],
+        "to_account": tx["to_account"],
+        "amount": tx["amount"],
+        "type": "transfer",
+        "time": tx["timestamp"]
+    }
+
+
+async def stream_admin_feed(db, match: dict):
+    # Rows leave as soon as each cursor batch arrives, so memory stays
+    # bounded by STREAM_BATCH_SIZE no matter how large the ledger is
+    cursor = db.transactions.aggregate(
+        admin_feed_pipeline(match),
+        batchSize=STREAM_BATCH_SIZE
+    )
+    async for tx in cursor:
+        yield dumps(admin_row(tx)) + b"\n"
+
+
+def compile_filters(filters, account_number: str = None):
+    # Every branch keeps an equality on from_account/to_account or a range
+    # on timestamp as the leading predicate, so it is served by the
+    # (account, timestamp) or (timestamp, amount) indexes
+    if account_number and filters.direction == "debit":
+        query = {"from_account": account_number}
+        if filters.counterparty:
+            query["to_account"] = filters.counterparty
+    elif account_number and filters.direction == "credit":
+        query = {"to_account": account_number}
+        if filters.counterparty:
+            query["from_account"] = filters.counterparty
+    elif account_number and filters.counterparty:
+        query = {"$or": [
+            {"from_account": account_number, "to_account": filters.counterparty},
+            {"from_account": filters.counterparty, "to_account": account_number}
+        ]}
+    elif account_number:
+        query = {"$or": [
+            {"from_account": account_number},
+            {"to_account": account_number}
+        ]}
+    elif filters.counterparty:
+        query = {"$or": [
+            {"from_account": filters.counterparty},
+            {"to_account": filters.counterparty}
+        ]}
+    else:
+        query = {}
+
+    window = {}
+    if filters.start:
+        window["$gte"] = datetime(filters.start.year, filters.start.month, filters.start.day)
+    if filters.end:
+        window["$lt"] = datetime(filters.end.year, filters.end.month, filters.end.day) + timedelta(days=1)
+    if window:
+        query["timestamp"] = window
+
+    amount = {}
+    if filters.min_amount is not None:
+        amount["$gte"] = filters.min_amount
+    if filters.max_amount is not None:
+        amount["$lte"] = filters.max_amount
+    if amount:
+        query["amount"] = amount
+
+    return query
+
+
+async def filtered_totals(db, query: dict, account_number: str):
+    # Count and credit/debit sums under exactly the filters the list uses,
+    # in one pass over the same index range
+    rows = await db.transactions.aggregate([
+        {"$match": query},
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "total_credit": {"$sum": {
+                "$cond": [{"$eq": ["$to_account", account_number]}, "$amount", 0]
+            }},
+            "total_debit": {"$sum": {
+                "$cond": [{"$eq": ["$from_account", account_number]}, "$amount", 0]
+            }}
+        }}
+    ]).to_list(length=1)
+
+    totals = rows[0] if rows else {"count": 0, "total_credit": 0, "total_debit": 0}
+    return {
+        "count": totals["count"],
+        "total_credit": totals["total_credit"],
+        "total_debit": totals["total_debit"],
+        "net_flow": totals["total_credit"] - totals["total_debit"]
+    }
+
+
+def statement_query(account_number: str, start=None, end=None, tx_type: str = None):
+    return compile_filters(
+        TransactionFilters(start=start, end=end, direction=tx_type),
+        account_number
+    )
+
+
+def _statement_row(tx, account_number: str, names):
+    debit = tx["from_account"] == account_number
+    counterparty = tx["to_account"] if debit else tx["from_account"]
+    return {
+        "time": tx["timestamp"].isoformat(),
+        "type": "debit" if debit else "credit",
+        "name": names.get(counterparty, "Unknown"),
+        "account_number": counterparty,
+        "amount": tx["amount"]
+    }
+
+
+# Spreadsheets evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_safe(value):
+    # Counterparty names are user-controlled; a leading quote makes a
+    # spreadsheet show them as text instead of running them
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _format_rows(rows, fmt: str):
+    if fmt == "ndjson":
+        return b"".join(dumps(row) + b"\n" for row in rows)
+
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, fieldnames=STATEMENT_COLUMNS).writerows(
+        {key: csv_safe(value) for key, value in row.items()} for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def stream_statement(db, account_number: str, query: dict, fmt: str = "csv"):
+    # Reads the ledger one cursor batch at a time and resolves names only
+    # for counterparties not seen in earlier chunks
+    if fmt == "csv":
+        yield ",".join(STATEMENT_COLUMNS) + "\r\n"
+
+    names = {}
+    cursor = db.transactions.find(
+        query,
+        {"from_account": 1, "to_account": 1, "amount": 1, "timestamp": 1}
+    ).sort([("timestamp", 1), ("_id", 1)]).batch_size(STREAM_BATCH_SIZE)
+
+    chunk = []
+    async for tx in cursor:
+        chunk.append(tx)
+        if len(chunk) == STREAM_BATCH_SIZE:
+            yield await _statement_chunk(db, chunk, account_number, names, fmt)
+            chunk = []
+    if chunk:
+        yield await _statement_chunk(db, chunk, account_number, names, fmt)
+
+
+async def _statement_chunk(db, chunk, account_number: str, names, fmt: str):
+    if len(names) > NAME_CACHE_SIZE:
+        names.clear()
+
+    counterparties = {
+        tx["to_account"] if tx["from_account"] == account_number else tx["from_account"]
+        for tx in chunk
+    }
+    names.update(await resolve_account_names(db, counterparties - names.keys()))
+
+    return _format_rows(
+        [_statement_row(tx, account_number, names) for tx in chunk],
+        fmt
+    )
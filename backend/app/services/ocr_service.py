@@ -1,14 +1,169 @@
-import pytesseract
-from PIL import Image
+import asyncio
+import multiprocessing
 import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from fastapi import HTTPException
+from app.core.config import settings
+
+# cv2, numpy and pytesseract are imported inside the functions that run in
+# the OCR worker processes, so API workers never load them at startup
 
 PAN_REGEX = r"[A-Z]{5}[0-9]{4}[A-Z]"
 
-def extract_pan_from_image(image_path: str):
-    image = Image.open(image_path)
-    text = pytesseract.image_to_string(image)
+# Cards are upscaled or downscaled to this width before OCR; tesseract is
+# both faster and more accurate at a fixed, moderate resolution
+OCR_WIDTH = 1000
+
+# The PAN number sits in the middle band of the card, left of the photo
+# as (top, bottom) and (left, right) fractions of the card
+PAN_REGION = ((0.35, 0.80), (0.0, 0.70))
+
+# Job state lives in the ocr_jobs collection (expired by a TTL index) so
+# any API worker can answer for a job another worker ran. The process pool
+# and the _running cap are per worker, like the CPU they protect.
+_pool = None
+_running = 0
+_tasks = set()
+
+
+def _deskew(binary):
+    import cv2
+    import numpy as np
+
+    coords = np.column_stack(np.where(binary > 0))[:, ::-1].astype(np.float32)
+    if len(coords) < 50:
+        return binary
+
+    angle = cv2.minAreaRect(coords)[-1]
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    if abs(angle) < 0.5:
+        return binary
+
+    h, w = binary.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(
+        binary, matrix, (w, h),
+        flags=cv2.INTER_CUBIC,
+        borderMode=cv2.BORDER_REPLICATE
+    )
+
+
+def _crop(image, region):
+    h, w = image.shape
+    (top, bottom), (left, right) = region
+    return image[int(top * h):int(bottom * h), int(left * w):int(right * w)]
+
+
+def preprocess(image_bytes: bytes):
+    import cv2
+    import numpy as np
+
+    image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError("Unreadable image")
+
+    scale = OCR_WIDTH / image.shape[1]
+    image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    # Otsu picks the threshold per image; invert so text is foreground
+    _, binary = cv2.threshold(
+        cv2.GaussianBlur(image, (3, 3), 0), 0, 255,
+        cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU
+    )
+    return cv2.bitwise_not(_deskew(binary))
+
+
+def extract_pan_from_bytes(image_bytes: bytes):
+    import pytesseract
 
-    match = re.search(PAN_REGEX, text)
-    if match:
-        return match.group()
+    image = preprocess(image_bytes)
+
+    # Try the expected PAN band first and only fall back to the full card
+    for candidate in (_crop(image, PAN_REGION), image):
+        text = pytesseract.image_to_string(candidate, config="--psm 6")
+        match = re.search(PAN_REGEX, text.replace(" ", "").upper())
+        if match:
+            return match.group()
     return None
+
+
+def extract_pan_from_image(image_path: str):
+    with open(image_path, "rb") as f:
+        return extract_pan_from_bytes(f.read())
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # Never fork the API process: it holds an event loop, Motor monitor
+        # threads, the bcrypt pool and the log listener, whose locks a
+        # forked child could inherit mid-use. forkserver children start
+        # from a clean interpreter and import cv2/numpy there, not here.
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.OCR_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver")
+        )
+    return _pool
+
+
+def shutdown_ocr_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def _run_job(db, job_id: str, image_bytes: bytes):
+    global _running
+    try:
+        loop = asyncio.get_running_loop()
+        await db.ocr_jobs.update_one({"_id": job_id}, {"$set": {"status": "running"}})
+        pan_number = await loop.run_in_executor(
+            _get_pool(), extract_pan_from_bytes, image_bytes
+        )
+        result = {"status": "done", "pan_number": pan_number}
+    except Exception as exc:
+        result = {"status": "failed", "error": str(exc)}
+    finally:
+        _running -= 1
+
+    await db.ocr_jobs.update_one({"_id": job_id}, {"$set": result})
+
+
+async def submit_ocr_job(db, user_id, image_bytes: bytes) -> str:
+    global _running
+    # Reject instead of queueing without bound when every slot is taken
+    if _running >= settings.OCR_MAX_JOBS:
+        raise HTTPException(status_code=429, detail="OCR busy, try again shortly")
+    _running += 1
+
+    job_id = uuid.uuid4().hex
+    try:
+        await db.ocr_jobs.insert_one({
+            "_id": job_id,
+            "user_id": user_id,
+            "status": "queued",
+            "pan_number": None,
+            "error": None,
+            "created_at": datetime.utcnow()
+        })
+    except Exception:
+        _running -= 1
+        raise
+
+    task = asyncio.create_task(_run_job(db, job_id, image_bytes))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job_id
+
+
+async def get_ocr_job(db, job_id: str, user_id):
+    job = await db.ocr_jobs.find_one({"_id": job_id, "user_id": user_id})
+    if not job:
+        raise HTTPException(status_code=404, detail="OCR job not found")
+    return job
@@ -0,0 +1,278 @@
+import asyncio
+import math
+from datetime import datetime
+from fastapi import HTTPException
+from pymongo import ReplaceOne
+from app.core.config import settings
+
+# Smoothing for the amount and inter-arrival averages; ~1/ALPHA transfers
+# of memory
+ALPHA = 0.1
+RECENT_COUNTERPARTIES = 32
+# Below this many transfers the profile is too thin to judge against
+MIN_HISTORY = 20
+# Amounts are profiled as log1p(amount), so deviations are relative. The
+# floor keeps a very regular sender from being judged on a tiny spread:
+# with a std of at least 0.5, about 1.65x the usual amount is one sigma
+VAR_FLOOR = 0.25
+MAX_BURST = 3.0
+NOVELTY = 2.0
+# Ledger rows held in memory at once by rebuild_profiles
+REBUILD_BATCH_ROWS = 50_000
+
+
+class TransferHeld(HTTPException):
+    def __init__(self, score: float, from_account: str, to_account: str, amount: float):
+        super().__init__(status_code=403, detail="Transfer held for review")
+        self.score = score
+        self.from_account = from_account
+        self.to_account = to_account
+        self.amount = amount
+
+
+def new_profile(account_number: str):
+    return {
+        "_id": account_number,
+        "count": 0,
+        "mean": 0.0,
+        "var": 0.0,
+        "gap": None,
+        "last_at": None,
+        "recent": []
+    }
+
+
+def amount_z(mean: float, var: float, amount: float) -> float:
+    return abs(math.log1p(amount) - mean) / math.sqrt(max(var, VAR_FLOOR))
+
+
+def score(profile, amount: float, counterparty: str, now: datetime) -> float:
+    # Log-amount z-score + capped burst factor + unfamiliar counterparty
+    if profile["count"] < MIN_HISTORY:
+        return 0.0
+
+    z = amount_z(profile["mean"], profile["var"], amount)
+
+    burst = 0.0
+    if profile["gap"] and profile["last_at"]:
+        gap = max((now - profile["last_at"]).total_seconds(), 1.0)
+        burst = min(math.log2(max(profile["gap"] / gap, 1.0)), MAX_BURST)
+
+    novelty = 0.0 if counterparty in profile["recent"] else NOVELTY
+    return round(z + burst + novelty, 3)
+
+
+def advance(profile, amount: float, counterparty: str, now: datetime):
+    # O(1) exponentially weighted update of the log-amount mean and
+    # variance and the arrival gap
+    amount = math.log1p(amount)
+    if profile["count"] == 0:
+        profile["mean"] = amount
+    else:
+        delta = amount - profile["mean"]
+        profile["mean"] += ALPHA * delta
+        profile["var"] = (1 - ALPHA) * (profile["var"] + ALPHA * delta * delta)
+
+    if profile["last_at"]:
+        gap = (now - profile["last_at"]).total_seconds()
+        profile["gap"] = gap if profile["gap"] is None else (
+            ALPHA * gap + (1 - ALPHA) * profile["gap"]
+        )
+
+    recent = [c for c in profile["recent"] if c != counterparty]
+    profile["recent"] = [counterparty] + recent[:RECENT_COUNTERPARTIES - 1]
+    profile["count"] += 1
+    profile["last_at"] = now
+    return profile
+
+
+async def load_profiles(db, account_numbers, session=None):
+    profiles = {
+        p["_id"]: p
+        async for p in db.risk_profiles.find(
+            {"_id": {"$in": list(set(account_numbers))}},
+            session=session
+        )
+    }
+    for number in account_numbers:
+        profiles.setdefault(number, new_profile(number))
+    return profiles
+
+
+async def save_profiles(db, profiles, session=None):
+    if profiles:
+        await db.risk_profiles.bulk_write([
+            ReplaceOne({"_id": p["_id"]}, p, upsert=True)
+            for p in profiles
+        ], ordered=False, session=session)
+
+
+async def screen(db, account_number: str, counterparty: str, amount: float,
+                 now: datetime, session=None):
+    # Scores the transfer against the sender's profile, then folds it in.
+    # Returns None for a clean transfer, the score for a flagged one, and
+    # raises TransferHeld above the hold threshold without saving.
+    risks, holds = await screen_batch(db, account_number, {counterparty: amount}, now, session)
+    if holds:
+        raise holds[0]
+    return risks.get(counterparty)
+
+
+def _holds(risk: float) -> bool:
+    return settings.RISK_HOLDS and risk >= settings.RISK_HOLD_THRESHOLD
+
+
+async def screen_batch(db, account_number: str, credits: dict, now: datetime,
+                       session=None):
+    # Bulk form of screen: one profile read and write for a batch, with
+    # each receiver's total scored against the profile as it stood before
+    # the batch. Returns the flagged scores by receiver and the holds.
+    if not settings.RISK_SCORING:
+        return {}, []
+
+    profile = (await load_profiles(db, [account_number], session))[account_number]
+    scored = {
+        counterparty: score(profile, amount, counterparty, now)
+        for counterparty, amount in credits.items()
+    }
+
+    holds = [
+        TransferHeld(risk, account_number, counterparty, credits[counterparty])
+        for counterparty, risk in scored.items()
+        if _holds(risk)
+    ]
+    if len(holds) == len(credits):
+        return {}, holds
+
+    for counterparty, amount in credits.items():
+        if not _holds(scored[counterparty]):
+            advance(profile, amount, counterparty, now)
+    await save_profiles(db, [profile], session)
+
+    risks = {
+        counterparty: risk
+        for counterparty, risk in scored.items()
+        if settings.RISK_FLAG_THRESHOLD <= risk and not _holds(risk)
+    }
+    return risks, holds
+
+
+async def record_hold(db, held: TransferHeld):
+    await db.risk_holds.insert_one({
+        "from_account": held.from_account,
+        "to_account": held.to_account,
+        "amount": held.amount,
+        "score": held.score,
+        "timestamp": datetime.utcnow()
+    })
+
+
+def _segments(keys):
+    # Start offset, length, segment index and offset-within-segment for a
+    # sorted key array
+    import numpy as np
+
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    counts = np.diff(np.r_[starts, len(keys)])
+    group = np.repeat(np.arange(len(starts)), counts)
+    return starts, counts, group, np.arange(len(keys)) - starts[group]
+
+
+def _group_ewma(values, keys):
+    # Final EWMA per group, seeded with each group's first value, computed
+    # from closed-form weights instead of a Python loop per row
+    import numpy as np
+
+    starts, counts, group, position = _segments(keys)
+    weights = ALPHA * (1 - ALPHA) ** (counts[group] - 1 - position).astype(float)
+    weights[starts] = (1 - ALPHA) ** (counts - 1).astype(float)
+    return np.add.reduceat(values * weights, starts), weights
+
+
+def _build_profiles(rows):
+    # Profiles for the accounts in rows, which are sorted by
+    # (from_account, timestamp) and hold each account's full history
+    import numpy as np
+
+    accounts = np.array([r["from_account"] for r in rows])
+    amounts = np.log1p(np.array([r["amount"] for r in rows], dtype=float))
+    times = np.array([r["timestamp"] for r in rows], dtype="datetime64[ms]")
+    seconds = times.astype("int64") / 1000.0
+
+    starts, counts, group, position = _segments(accounts)
+
+    mean, weights = _group_ewma(amounts, accounts)
+    # Weighted spread around the final mean; approximates the incremental
+    # EW variance closely once a profile has more than a few transfers
+    var = np.add.reduceat(weights * (amounts - mean[group]) ** 2, starts)
+
+    # Inter-arrival gaps exist from each account's second transfer onwards
+    has_gap = counts > 1
+    gap = np.zeros(len(starts))
+    later = position > 0
+    if later.any():
+        gap_ewma, _ = _group_ewma(np.diff(seconds, prepend=0)[later], group[later])
+        gap[has_gap] = gap_ewma
+
+    z = np.abs(amounts - mean[group]) / np.sqrt(np.maximum(var[group], VAR_FLOOR))
+    flagged = np.add.reduceat(
+        ((z >= settings.RISK_FLAG_THRESHOLD) & (counts[group] >= MIN_HISTORY)).astype(int),
+        starts
+    )
+
+    profiles = []
+    for i, start in enumerate(starts):
+        end = start + counts[i]
+        recent = list(dict.fromkeys(r["to_account"] for r in reversed(rows[start:end])))
+        profiles.append({
+            "_id": str(accounts[start]),
+            "count": int(counts[i]),
+            "mean": float(mean[i]),
+            "var": float(var[i]),
+            "gap": float(gap[i]) if has_gap[i] else None,
+            "last_at": rows[end - 1]["timestamp"],
+            "recent": recent[:RECENT_COUNTERPARTIES],
+            "flagged_in_history": int(flagged[i])
+        })
+    return profiles
+
+
+async def rebuild_profiles(db):
+    # Offline batch mode: recompute every profile from the full ledger and
+    # re-score each account's history against it. The ledger is streamed
+    # in (from_account, timestamp) order and cut into chunks of about
+    # REBUILD_BATCH_ROWS at account boundaries, so memory is bounded by the
+    # chunk size (or the largest single account), not the ledger. NumPy is
+    # only needed here, so the transfer path never imports it.
+    cursor = db.transactions.find(
+        {},
+        {"_id": 0, "from_account": 1, "to_account": 1, "amount": 1, "timestamp": 1},
+        batch_size=REBUILD_BATCH_ROWS
+    ).sort([("from_account", 1), ("timestamp", 1)])
+
+    rebuilt = 0
+    rows = []
+    async for row in cursor:
+        if len(rows) >= REBUILD_BATCH_ROWS and row["from_account"] != rows[-1]["from_account"]:
+            profiles = _build_profiles(rows)
+            await save_profiles(db, profiles)
+            rebuilt += len(profiles)
+            rows = []
+        rows.append(row)
+
+    if rows:
+        profiles = _build_profiles(rows)
+        await save_profiles(db, profiles)
+        rebuilt += len(profiles)
+    return rebuilt
+
+
+async def _main():
+    from app.db.mongodb import close_mongo_connection, connect_to_mongo, get_db
+    await connect_to_mongo()
+    print(f"rebuilt {await rebuild_profiles(get_db())} risk profiles")
+    close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,125 @@
+import asyncio
+import random
+from pymongo import UpdateOne
+from app.core.config import settings
+
+GLOBAL_SCOPE = "global"
+# The bank-wide bucket is split into shards ("global:0", "global:1", ...)
+# so concurrent transfer transactions don't all write-conflict on one
+# document; summarize adds them back up
+GLOBAL_SHARDS = {"$regex": f"^{GLOBAL_SCOPE}:"}
+
+
+def _scope_filter(scope: str):
+    return GLOBAL_SHARDS if scope == GLOBAL_SCOPE else scope
+
+
+def _bucket(scope: str, day: str, credit: float = 0, debit: float = 0):
+    return UpdateOne(
+        {"scope": scope, "day": day},
+        {"$inc": {"credit": credit, "debit": debit, "count": 1}},
+        upsert=True
+    )
+
+
+async def record_transfers(db, transactions, session=None):
+    # Daily buckets for both parties plus the bank-wide total, written in
+    # the caller's transaction so rollups never drift from the ledger
+    shard = f"{GLOBAL_SCOPE}:{random.randrange(settings.ROLLUP_GLOBAL_SHARDS)}"
+    updates = []
+    for transaction in transactions:
+        day = transaction["timestamp"].strftime("%Y-%m-%d")
+        amount = transaction["amount"]
+        updates += [
+            _bucket(transaction["from_account"], day, debit=amount),
+            _bucket(transaction["to_account"], day, credit=amount),
+            _bucket(shard, day, credit=amount, debit=amount),
+        ]
+
+    await db.analytics.bulk_write(updates, ordered=False, session=session)
+
+
+async def summarize(db, scope: str, start_day: str, end_day: str):
+    rows = await db.analytics.aggregate([
+        {"$match": {
+            "scope": _scope_filter(scope),
+            "day": {"$gte": start_day, "$lte": end_day}
+        }},
+        {"$group": {
+            "_id": None,
+            "credit": {"$sum": "$credit"},
+            "debit": {"$sum": "$debit"},
+            "count": {"$sum": "$count"}
+        }}
+    ]).to_list(length=1)
+
+    totals = rows[0] if rows else {"credit": 0, "debit": 0, "count": 0}
+    return {
+        "total_credit": totals["credit"],
+        "total_debit": totals["debit"],
+        "net_flow": totals["credit"] - totals["debit"],
+        "total_transactions": totals["count"]
+    }
+
+
+def _rebuild_pipeline(scope, side: str):
+    return [
+        {"$group": {
+            "_id": {
+                "scope": scope,
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}
+            },
+            side: {"$sum": "$amount"},
+            "count": {"$sum": 1}
+        }},
+        {"$project": {
+            "_id": 0,
+            "scope": "$_id.scope",
+            "day": "$_id.day",
+            side: 1,
+            "count": 1
+        }},
+        {"$merge": {
+            "into": "analytics",
+            "on": ["scope", "day"],
+            "whenMatched": [{"$set": {
+                side: {"$add": [{"$ifNull": [f"${side}", 0]}, f"$$new.{side}"]},
+                "count": {"$add": [{"$ifNull": ["$count", 0]}, "$$new.count"]}
+            }}],
+            "whenNotMatched": "insert"
+        }}
+    ]
+
+
+async def rebuild_rollups(db):
+    # Recomputes every bucket from the ledger; run once for pre-existing
+    # history or after restoring transactions from a backup
+    await db.analytics.delete_many({})
+    await db.transactions.aggregate(_rebuild_pipeline("$from_account", "debit")).to_list(None)
+    await db.transactions.aggregate(_rebuild_pipeline("$to_account", "credit")).to_list(None)
+    await db.transactions.aggregate(
+        _rebuild_pipeline(f"{GLOBAL_SCOPE}:0", "credit")
+    ).to_list(None)
+    await db.analytics.update_many(
+        {"scope": GLOBAL_SHARDS},
+        [{"$set": {"debit": "$credit"}}]
+    )
+    # Accounts that only ever sent or only ever received miss one side
+    await db.analytics.update_many(
+        {"scope": {"$not": {"$regex": f"^{GLOBAL_SCOPE}:"}}},
+        [{"$set": {
+            "credit": {"$ifNull": ["$credit", 0]},
+            "debit": {"$ifNull": ["$debit", 0]}
+        }}]
+    )
+
+
+async def _main():
+    from app.db.mongodb import close_mongo_connection, connect_to_mongo, get_db
+    await connect_to_mongo()
+    await rebuild_rollups(get_db())
+    close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,133 @@
+import base64
+import json
+import math
+import re
+import unicodedata
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+MAX_SEARCH_RESULTS = 50
+# Fuzzy matches must share at least this fraction of the query's trigrams
+MIN_TRIGRAM_OVERLAP = 0.3
+# Upper bound on users scored per fuzzy query
+FUZZY_CANDIDATES = 2000
+
+
+def normalize_name(name: str) -> str:
+    # "  José  Kumar" -> "jose kumar"
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return " ".join(name.lower().split())
+
+
+def trigrams(name: str):
+    padded = f"  {normalize_name(name)} "
+    return sorted({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def search_fields(name: str):
+    return {
+        "name_normalized": normalize_name(name),
+        "name_trigrams": trigrams(name)
+    }
+
+
+async def backfill_search_fields(db):
+    cursor = db.users.find(
+        {"name_normalized": {"$exists": False}},
+        {"name": 1}
+    )
+    async for user in cursor:
+        await db.users.update_one(
+            {"_id": user["_id"]},
+            {"$set": search_fields(user.get("name", ""))}
+        )
+
+
+def _encode_cursor(user) -> str:
+    raw = json.dumps({"name": user["name_normalized"], "id": str(user["_id"])})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return raw["name"], ObjectId(raw["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# One $lookup for the whole page instead of a find_one per user
+WITH_ACCOUNTS = {"$lookup": {
+    "from": "accounts",
+    "localField": "_id",
+    "foreignField": "user_id",
+    "as": "accounts"
+}}
+
+
+def search_rows(users):
+    return [
+        {
+            "name": user["name"],
+            "email": user["email"],
+            "account_number": acc["account_number"],
+            "account_type": acc["account_type"],
+            "balance": acc["balance"],
+            "daily_limit": acc["daily_limit"],
+            "is_active": acc["is_active"]
+        }
+        for user in users
+        for acc in user["accounts"]
+    ]
+
+
+async def prefix_search(db, query: str, limit: int, cursor: str = None):
+    # Anchored prefix on the normalized name is an index range scan
+    match = {"name_normalized": {"$regex": f"^{re.escape(normalize_name(query))}"}}
+    if cursor:
+        name, oid = _decode_cursor(cursor)
+        match = {"$and": [match, {"$or": [
+            {"name_normalized": {"$gt": name}},
+            {"name_normalized": name, "_id": {"$gt": oid}}
+        ]}]}
+
+    users = await db.users.aggregate([
+        {"$match": match},
+        {"$sort": {"name_normalized": 1, "_id": 1}},
+        {"$limit": limit + 1},
+        {"$project": {"name": 1, "email": 1, "name_normalized": 1}},
+        WITH_ACCOUNTS,
+    ]).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = _encode_cursor(users[-1])
+
+    return search_rows(users), next_cursor
+
+
+async def fuzzy_search(db, query: str, limit: int):
+    # Ranked by how many trigrams the name shares with the query. Any one
+    # shared trigram matches most of the collection for short or common
+    # queries, so candidates are capped before scoring and names sharing
+    # too few trigrams are dropped before the in-memory sort.
+    grams = trigrams(query)
+    min_score = math.ceil(len(grams) * MIN_TRIGRAM_OVERLAP)
+    users = await db.users.aggregate([
+        {"$match": {"name_trigrams": {"$in": grams}}},
+        {"$limit": FUZZY_CANDIDATES},
+        {"$project": {
+            "name": 1,
+            "email": 1,
+            "score": {"$size": {"$setIntersection": ["$name_trigrams", grams]}}
+        }},
+        {"$match": {"score": {"$gte": min_score}}},
+        {"$sort": {"score": -1, "_id": 1}},
+        {"$limit": limit},
+        WITH_ACCOUNTS,
+    ]).to_list(length=limit)
+
+    return search_rows(users)
@@ -1,17 +1,62 @@
+import asyncio
+import copy
+import hashlib
 from datetime import datetime, timedelta
 from fastapi import HTTPException
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo import ReturnDocument, UpdateOne
+from app.core.config import settings
+from app.services.event_service import hub
+from app.services.risk_service import TransferHeld, record_hold, screen, screen_batch
+from app.services.rollup_service import record_transfers
+from app.utils.response import dumps
 from datetime import datetime
 
 
 def start_of_today():
     now = datetime.utcnow()
     return datetime(now.year, now.month, now.day)
-async def transfer_money(db, sender, to_account_number: str, amount: float):
-    if amount <= 0:
-        raise HTTPException(status_code=400, detail="Invalid amount")
 
+
+def today_key():
+    return start_of_today().strftime("%Y-%m-%d")
+
+
+def spent_today(account, day: str):
+    # The counter is only meaningful for the day it was last written
+    if account.get("spend_date") != day:
+        return 0
+    return account.get("spent_today", 0)
+
+
+def _spent_today_expr(day: str):
+    return {"$cond": [{"$eq": ["$spend_date", day]}, "$spent_today", 0]}
+
+
+async def resolve_source(db, sender, from_account_number: str = None):
+    # An explicit source wins (ownership is enforced by the debit filter);
+    # otherwise the user's primary account, falling back to the oldest
+    # account that can transfer for users created before it was recorded
+    if from_account_number:
+        return from_account_number
+    if sender.get("primary_account"):
+        return sender["primary_account"]
+
+    account = await db.accounts.find_one(
+        {"user_id": sender["_id"], "is_active": True, "account_type": {"$ne": "fd"}},
+        {"account_number": 1},
+        sort=[("_id", 1)]
+    )
+    if not account:
+        raise HTTPException(status_code=404, detail="Sender account not found")
+    return account["account_number"]
+
+
+async def _debit_failure(db, sender, source: str, amount: float, day: str):
+    # Only reached when the guarded debit matched nothing; work out why
     sender_account = await db.accounts.find_one({
         "user_id": sender["_id"],
+        "account_number": source,
         "is_active": True
     })
 
@@ -21,51 +66,612 @@ async def transfer_money(db, sender, to_account_number: str, amount: float):
     if sender_account["account_type"] == "fd":
         raise HTTPException(status_code=400, detail="FD accounts cannot transfer")
 
-    receiver_account = await db.accounts.find_one({
-        "account_number": to_account_number,
-        "is_active": True
-    })
-
-    if not receiver_account:
-        raise HTTPException(status_code=404, detail="Receiver account not found")
-
     if sender_account["balance"] < amount:
         raise HTTPException(status_code=400, detail="Insufficient balance")
 
-    # DAILY LIMIT CHECK
-    today_start = start_of_today()
+    if spent_today(sender_account, day) + amount > sender_account["daily_limit"]:
+        raise HTTPException(status_code=400, detail="Daily transaction limit exceeded")
 
-    cursor = db.transactions.find({
-        "from_account": sender_account["account_number"],
-        "timestamp": {"$gte": today_start}
-    })
+    raise HTTPException(status_code=409, detail="Transfer conflict, please retry")
 
-    today_total = 0
-    async for tx in cursor:
-        today_total += tx["amount"]
 
-    if today_total + amount > sender_account["daily_limit"]:
-        raise HTTPException(status_code=400, detail="Daily transaction limit exceeded")
+async def _debit(db, sender, source: str, amount: float, day: str, session=None):
+    # Balance, status, account type and the per-day spend counter are all
+    # checked and updated by this one write, so concurrent transfers
+    # cannot overdraw or exceed the limit
+    return await db.accounts.find_one_and_update(
+        {
+            "account_number": source,
+            "user_id": sender["_id"],
+            "is_active": True,
+            "account_type": {"$ne": "fd"},
+            "balance": {"$gte": amount},
+            "$expr": {
+                "$lte": [
+                    {"$add": [_spent_today_expr(day), amount]},
+                    "$daily_limit"
+                ]
+            }
+        },
+        [{"$set": {
+            "balance": {"$subtract": ["$balance", amount]},
+            "spent_today": {"$add": [_spent_today_expr(day), amount]},
+            "spend_date": day,
+            "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]}
+        }}],
+        projection={"account_number": 1, "balance": 1},
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+
+
+def _publish(transactions, balances):
+    # With the change-stream feed the watcher publishes instead
+    if settings.EVENTS_SOURCE != "local":
+        return
+    for transaction in transactions:
+        hub.publish_transaction(transaction)
+    for account_number, balance in balances.items():
+        hub.publish_balance(account_number, balance)
 
-    # BALANCE UPDATE
+
+async def _publish_batch(db, transactions, balances):
+    # Batched credits go through bulk_write, which returns no documents, so
+    # the receivers' balances are read after commit in one query
+    if settings.EVENTS_SOURCE != "local" or not transactions:
+        return
+    credited = list({tx["to_account"] for tx in transactions} - balances.keys())
+    if credited:
+        async for account in db.accounts.find(
+            {"account_number": {"$in": credited}},
+            {"account_number": 1, "balance": 1}
+        ):
+            balances[account["account_number"]] = account["balance"]
+    _publish(transactions, balances)
+
+
+async def _reverse_debit(db, account_id, amount: float, session=None):
     await db.accounts.update_one(
-        {"_id": sender_account["_id"]},
-        {"$inc": {"balance": -amount}}
+        {"_id": account_id},
+        [{"$set": {
+            "balance": {"$add": ["$balance", amount]},
+            "spent_today": {"$subtract": ["$spent_today", amount]},
+            "version": {"$add": ["$version", 1]}
+        }}],
+        session=session
     )
 
-    await db.accounts.update_one(
-        {"_id": receiver_account["_id"]},
-        {"$inc": {"balance": amount}}
+
+async def _find_replay(db, sender, idempotency_key: str, session=None):
+    return await db.transactions.find_one(
+        {"sender_id": sender["_id"], "idempotency_key": idempotency_key},
+        session=session
     )
 
-    # TRANSACTION LOG
-    transaction = {
-        "from_account": sender_account["account_number"],
-        "to_account": receiver_account["account_number"],
-        "amount": amount,
-        "timestamp": datetime.utcnow()
+
+def check_replay(replay, to_account_number: str, amount: float, from_account_number: str = None):
+    # The ledger row records what the original request asked for; a key
+    # reused for a different transfer is a client bug, not a retry
+    if (
+        replay["to_account"] != to_account_number
+        or replay["amount"] != amount
+        or (from_account_number and replay["from_account"] != from_account_number)
+    ):
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    return replay
+
+
+async def transfer_money(db, sender, to_account_number: str, amount: float,
+                         idempotency_key: str = None, from_account_number: str = None):
+    if amount <= 0:
+        raise HTTPException(status_code=400, detail="Invalid amount")
+
+    if idempotency_key:
+        replay = await _find_replay(db, sender, idempotency_key)
+        if replay:
+            return check_replay(replay, to_account_number, amount, from_account_number)
+
+    source = await resolve_source(db, sender, from_account_number)
+
+    if settings.LEDGER_GROUP_COMMIT:
+        return await group_commit.submit(
+            db, sender, source, to_account_number, amount, idempotency_key
+        )
+
+    return await _transfer_one(db, sender, source, to_account_number, amount, idempotency_key)
+
+
+async def _transfer_one(db, sender, source: str, to_account_number: str, amount: float,
+                        idempotency_key: str = None):
+    day = today_key()
+
+    async def run(session):
+        receiver_account = await db.accounts.find_one(
+            {"account_number": to_account_number, "is_active": True},
+            {"_id": 1, "account_number": 1},
+            session=session
+        )
+
+        if not receiver_account:
+            raise HTTPException(status_code=404, detail="Receiver account not found")
+
+        sender_account = await _debit(db, sender, source, amount, day, session)
+
+        if not sender_account:
+            await _debit_failure(db, sender, source, amount, day)
+
+        now = datetime.utcnow()
+        risk = await screen(
+            db, sender_account["account_number"], receiver_account["account_number"],
+            amount, now, session
+        )
+
+        receiver_account = await db.accounts.find_one_and_update(
+            {"_id": receiver_account["_id"]},
+            {"$inc": {"balance": amount, "version": 1}},
+            projection={"account_number": 1, "balance": 1},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+
+        # TRANSACTION LOG
+        transaction = {
+            "from_account": sender_account["account_number"],
+            "to_account": receiver_account["account_number"],
+            "amount": amount,
+            "timestamp": now
+        }
+        if risk:
+            transaction["risk_score"] = risk
+        if idempotency_key:
+            transaction["sender_id"] = sender["_id"]
+            transaction["idempotency_key"] = idempotency_key
+
+        await db.transactions.insert_one(transaction, session=session)
+        await record_transfers(db, [transaction], session=session)
+        balances[sender_account["account_number"]] = sender_account["balance"]
+        balances[receiver_account["account_number"]] = receiver_account["balance"]
+        return transaction
+
+    balances = {}
+    try:
+        async with await db.client.start_session() as session:
+            transaction = await session.with_transaction(run)
+    except TransferHeld as held:
+        # The transaction aborted, so the debit never happened
+        await record_hold(db, held)
+        raise
+    except DuplicateKeyError:
+        # A concurrent retry with the same key committed first; the unique
+        # ledger index rolled this attempt back, debit included
+        replay = await _find_replay(db, sender, idempotency_key)
+        if not replay:
+            raise
+        return check_replay(replay, to_account_number, amount, source)
+
+    _publish([transaction], balances)
+    return transaction
+
+
+class GroupCommitter:
+    # Collects transfers arriving within a short window and commits them as
+    # one session transaction: guarded debits per transfer, one bulk_write
+    # of credits and one ordered insert_many of ledger rows. Each caller's
+    # future resolves only after that shared commit, so clients see the
+    # same all-or-nothing outcome as the single-transfer path while many
+    # transfers share one durable write acknowledgement.
+
+    def __init__(self):
+        self._pending = []
+        self._keys = {}
+        self._timer = None
+        # The loop only keeps weak references to tasks; a collected flush
+        # would leave its callers waiting forever
+        self._tasks = set()
+
+    async def submit(self, db, sender, source: str, to_account_number: str, amount: float,
+                     idempotency_key: str = None):
+        if idempotency_key:
+            # A retry racing its original in the same window shares its result
+            duplicate = self._keys.get((sender["_id"], idempotency_key))
+            if duplicate:
+                return check_replay(
+                    await asyncio.shield(duplicate), to_account_number, amount, source
+                )
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(
+            (db, sender, source, to_account_number, amount, idempotency_key, future)
+        )
+        if idempotency_key:
+            self._keys[(sender["_id"], idempotency_key)] = future
+
+        if len(self._pending) >= settings.LEDGER_GROUP_MAX:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                settings.LEDGER_GROUP_WINDOW_MS / 1000, self._flush_now
+            )
+
+        return await future
+
+    def _flush_now(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending, self._keys = self._pending, [], {}
+        if batch:
+            task = asyncio.create_task(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch):
+        try:
+            await self._settle(batch)
+        finally:
+            # Nothing in _settle may leave a caller waiting, even on an
+            # unexpected error or cancellation
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(HTTPException(
+                        status_code=503,
+                        detail="Transfer outcome unknown, retry with the same Idempotency-Key"
+                    ))
+
+    async def _settle(self, batch):
+        db = batch[0][0]
+        try:
+            outcomes, balances = await self._commit(db, batch)
+        except BulkWriteError as exc:
+            if any(e["code"] != 11000 for e in exc.details["writeErrors"]):
+                outcomes = [exc] * len(batch)
+                balances = {}
+            else:
+                outcomes, balances = await self._replay_individually(batch)
+        except Exception as exc:
+            outcomes = [exc] * len(batch)
+            balances = {}
+
+        committed = []
+        for (db, sender, source, _, amount, _, future), outcome in zip(batch, outcomes):
+            if outcome is None:
+                # Guarded debit did not match; report the precise reason
+                try:
+                    await _debit_failure(db, sender, source, amount, today_key())
+                except Exception as exc:
+                    outcome = exc
+            if not isinstance(outcome, BaseException):
+                committed.append(outcome)
+            if future.done():
+                # The caller went away; the commit stands regardless
+                continue
+            if isinstance(outcome, BaseException):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+        if balances:
+            await _publish_batch(db, committed, balances)
+
+    async def _replay_individually(self, batch):
+        # Another worker committed one of these idempotency keys first; the
+        # batch rolled back, so rerun each transfer on the single path,
+        # which resolves replays per row and publishes its own events
+        outcomes = await asyncio.gather(*(
+            _transfer_one(db, sender, source, to, amount, key)
+            for db, sender, source, to, amount, key, _ in batch
+        ), return_exceptions=True)
+        return outcomes, {}
+
+    async def _commit(self, db, batch):
+        day = today_key()
+        balances = {}
+        holds = []
+
+        async def run(session):
+            balances.clear()
+            holds.clear()
+            receivers = {
+                acc["account_number"]: acc
+                async for acc in db.accounts.find(
+                    {
+                        "account_number": {"$in": list({item[3] for item in batch})},
+                        "is_active": True
+                    },
+                    {"_id": 1, "account_number": 1},
+                    session=session
+                )
+            }
+
+            outcomes = []
+            credits = {}
+            ledger = []
+            now = datetime.utcnow()
+            for _, sender, source, to_account_number, amount, idempotency_key, _ in batch:
+                if amount <= 0:
+                    outcomes.append(HTTPException(status_code=400, detail="Invalid amount"))
+                    continue
+                if to_account_number not in receivers:
+                    outcomes.append(HTTPException(status_code=404, detail="Receiver account not found"))
+                    continue
+
+                debited = await _debit(db, sender, source, amount, day, session)
+                if not debited:
+                    outcomes.append(None)
+                    continue
+
+                try:
+                    risk = await screen(
+                        db, debited["account_number"], to_account_number,
+                        amount, now, session
+                    )
+                except TransferHeld as held:
+                    # Other transfers share this transaction, so undo just
+                    # this debit instead of aborting
+                    await _reverse_debit(db, debited["_id"], amount, session)
+                    holds.append(held)
+                    outcomes.append(held)
+                    continue
+
+                balances[debited["account_number"]] = debited["balance"]
+                credits[to_account_number] = credits.get(to_account_number, 0) + amount
+
+                transaction = {
+                    "from_account": debited["account_number"],
+                    "to_account": to_account_number,
+                    "amount": amount,
+                    "timestamp": now
+                }
+                if risk:
+                    transaction["risk_score"] = risk
+                if idempotency_key:
+                    transaction["sender_id"] = sender["_id"]
+                    transaction["idempotency_key"] = idempotency_key
+                ledger.append(transaction)
+                outcomes.append(transaction)
+
+            if ledger:
+                await db.accounts.bulk_write([
+                    UpdateOne(
+                        {"_id": receivers[number]["_id"]},
+                        {"$inc": {"balance": total, "version": 1}}
+                    )
+                    for number, total in credits.items()
+                ], ordered=False, session=session)
+                await db.transactions.insert_many(ledger, ordered=True, session=session)
+                await record_transfers(db, ledger, session=session)
+
+            return outcomes
+
+        async with await db.client.start_session() as session:
+            outcomes = await session.with_transaction(run)
+
+        for held in holds:
+            await record_hold(db, held)
+        return outcomes, balances
+
+
+group_commit = GroupCommitter()
+
+
+def _row_result(index: int, row, status: str, detail: str = None):
+    return {
+        "index": index,
+        "to_account_number": row.to_account_number,
+        "amount": row.amount,
+        "status": status,
+        "detail": detail,
+        "transaction_id": None
+    }
+
+
+async def bulk_transfer(db, sender, rows, mode: str = "atomic",
+                        from_account_number: str = None, idempotency_key: str = None):
+    # One receiver lookup, one debit for the batch total, one bulk_write of
+    # credits and one insert_many of ledger rows, however many rows there are
+    request_hash = None
+    if idempotency_key:
+        request_hash = bulk_request_hash(rows, mode, from_account_number)
+        replay = await _find_bulk_replay(db, sender, idempotency_key, request_hash)
+        if replay:
+            return replay
+
+    results = [_row_result(i, row, "pending") for i, row in enumerate(rows)]
+
+    receivers = {
+        acc["account_number"]: acc
+        async for acc in db.accounts.find(
+            {
+                "account_number": {"$in": list({r.to_account_number for r in rows})},
+                "is_active": True
+            },
+            {"_id": 1, "account_number": 1}
+        )
     }
 
-    await db.transactions.insert_one(transaction)
+    for result in results:
+        if result["amount"] <= 0:
+            result.update(status="rejected", detail="Invalid amount")
+        elif result["to_account_number"] not in receivers:
+            result.update(status="rejected", detail="Receiver account not found")
+
+    source = await resolve_source(db, sender, from_account_number)
+    sender_account = await db.accounts.find_one({
+        "account_number": source,
+        "user_id": sender["_id"],
+        "is_active": True
+    })
+    if not sender_account:
+        raise HTTPException(status_code=404, detail="Sender account not found")
+    if sender_account["account_type"] == "fd":
+        raise HTTPException(status_code=400, detail="FD accounts cannot transfer")
+
+    day = today_key()
+    available = min(
+        sender_account["balance"],
+        sender_account["daily_limit"] - spent_today(sender_account, day)
+    )
+
+    # Best effort takes rows in order while they fit; atomic needs them all
+    total = 0
+    for result in results:
+        if result["status"] != "pending":
+            continue
+        if total + result["amount"] > available:
+            result.update(
+                status="rejected",
+                detail="Insufficient balance or daily limit exceeded"
+            )
+            continue
+        total += result["amount"]
+        result["status"] = "accepted"
+
+    accepted = [r for r in results if r["status"] == "accepted"]
+
+    if mode == "atomic" and len(accepted) != len(results):
+        for result in accepted:
+            result.update(status="rejected", detail="Batch rejected")
+        return {"applied": 0, "total": 0, "results": results}
+
+    if not accepted:
+        return {"applied": 0, "total": 0, "results": results}
+
+    async def run(session):
+        holds.clear()
+        balances.clear()
+        now = datetime.utcnow()
+
+        credits = {}
+        for result in accepted:
+            number = result["to_account_number"]
+            credits[number] = credits.get(number, 0) + result["amount"]
+
+        # Each receiver is screened on its total, so splitting a held
+        # payment into bulk rows gets the same treatment as /transfer
+        risks, held = await screen_batch(
+            db, sender_account["account_number"], credits, now, session
+        )
+        holds.extend(held)
+        if holds and mode == "atomic":
+            raise holds[0]
+
+        held_numbers = {h.to_account for h in holds}
+        payable = [r for r in accepted if r["to_account_number"] not in held_numbers]
+        if not payable:
+            return []
+
+        debited = await _debit(
+            db, sender, source, sum(r["amount"] for r in payable), day, session
+        )
+        if not debited:
+            raise HTTPException(
+                status_code=409,
+                detail="Balance changed during batch, please retry"
+            )
+
+        await db.accounts.bulk_write([
+            UpdateOne(
+                {"_id": receivers[number]["_id"]},
+                {"$inc": {"balance": amount, "version": 1}}
+            )
+            for number, amount in credits.items()
+            if number not in held_numbers
+        ], ordered=False, session=session)
+
+        ledger = []
+        for result in payable:
+            transaction = {
+                "from_account": sender_account["account_number"],
+                "to_account": result["to_account_number"],
+                "amount": result["amount"],
+                "timestamp": now
+            }
+            if result["to_account_number"] in risks:
+                transaction["risk_score"] = risks[result["to_account_number"]]
+            ledger.append(transaction)
+
+        await db.transactions.insert_many(ledger, session=session)
+        await record_transfers(db, ledger, session=session)
+        balances[debited["account_number"]] = debited["balance"]
+
+        if idempotency_key:
+            # Stored with the ledger rows, so a retry can only ever see a
+            # batch that committed
+            saved = _bulk_response(copy.deepcopy(results), ledger, held_numbers)
+            await db.bulk_requests.insert_one({
+                "_id": _bulk_request_id(sender, idempotency_key),
+                "request_hash": request_hash,
+                "response": saved,
+                "created_at": now
+            }, session=session)
+        return ledger
+
+    balances = {}
+    holds = []
+
+    try:
+        async with await db.client.start_session() as session:
+            ledger = await session.with_transaction(run)
+    except TransferHeld:
+        ledger = []
+    except DuplicateKeyError:
+        # A concurrent retry with the same key committed first
+        replay = await _find_bulk_replay(db, sender, idempotency_key, request_hash)
+        if not replay:
+            raise
+        return replay
+
+    for held in holds:
+        await record_hold(db, held)
+
+    if ledger:
+        await _publish_batch(db, ledger, balances)
+
+    return _bulk_response(results, ledger, {h.to_account for h in holds})
+
+
+def _bulk_response(results, ledger, held_numbers):
+    # Final per-row outcome once the batch transaction has settled
+    committed = iter(ledger)
+    total = 0
+    for result in results:
+        if result["status"] != "accepted":
+            continue
+        if result["to_account_number"] in held_numbers:
+            result.update(status="rejected", detail="Transfer held for review")
+        elif not ledger:
+            result.update(status="rejected", detail="Batch rejected")
+        else:
+            result.update(status="ok", transaction_id=str(next(committed)["_id"]))
+            total += result["amount"]
+
+    return {"applied": len(ledger), "total": total, "results": results}
+
+
+def _bulk_request_id(sender, idempotency_key: str):
+    return {"sender_id": sender["_id"], "key": idempotency_key}
+
+
+def bulk_request_hash(rows, mode: str, from_account_number: str = None) -> str:
+    payload = dumps({
+        "mode": mode,
+        "from": from_account_number,
+        "rows": [[row.to_account_number, row.amount] for row in rows]
+    })
+    return hashlib.sha256(payload).hexdigest()
+
 
-    return transaction
\ No newline at end of file
+async def _find_bulk_replay(db, sender, idempotency_key: str, request_hash: str):
+    saved = await db.bulk_requests.find_one({"_id": _bulk_request_id(sender, idempotency_key)})
+    if not saved:
+        return None
+    if saved["request_hash"] != request_hash:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    return saved["response"]
@@ -1,7 +1,67 @@
-import random
-import string
+import asyncio
+from pymongo import ReturnDocument
 
-def generate_account_number():
-    # Example: SBK + 9 digits
-    digits = "".join(random.choices(string.digits, k=9))
-    return f"SBK{digits}"
+BLOCK_SIZE = 100
+SEQUENCE_DIGITS = 8
+
+
+def luhn_check_digit(digits: str) -> str:
+    total = 0
+    # Walk right to left, doubling every other digit starting with the last
+    for i, d in enumerate(reversed(digits)):
+        n = int(d)
+        if i % 2 == 0:
+            n *= 2
+            if n > 9:
+                n -= 9
+        total += n
+    return str((10 - total % 10) % 10)
+
+
+def format_account_number(sequence: int) -> str:
+    # Example: SBK + 8 digit sequence + check digit
+    digits = str(sequence).zfill(SEQUENCE_DIGITS)
+    return f"SBK{digits}{luhn_check_digit(digits)}"
+
+
+def is_valid_account_number(account_number: str) -> bool:
+    digits = account_number[3:]
+    return (
+        account_number.startswith("SBK")
+        and len(digits) == SEQUENCE_DIGITS + 1
+        and digits.isdigit()
+        and luhn_check_digit(digits[:-1]) == digits[-1]
+    )
+
+
+class AccountNumberAllocator:
+    # Reserves BLOCK_SIZE sequence numbers per round trip to the counter
+    # document and hands them out from memory; blocks never overlap, so
+    # workers cannot collide
+
+    def __init__(self, block_size: int = BLOCK_SIZE):
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def _reserve_block(self, db):
+        counter = await db.counters.find_one_and_update(
+            {"_id": "account_number"},
+            {"$inc": {"value": self.block_size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._end = counter["value"]
+        self._next = self._end - self.block_size
+
+    async def next(self, db) -> str:
+        async with self._lock:
+            if self._next >= self._end:
+                await self._reserve_block(db)
+            sequence = self._next
+            self._next += 1
+        return format_account_number(sequence)
+
+
+account_numbers = AccountNumberAllocator()
@@ -0,0 +1,91 @@
+import asyncio
+import base64
+import heapq
+import json
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+MAX_PAGE_SIZE = 100
+PAGE_SORT = [("timestamp", -1), ("_id", -1)]
+
+
+def encode_cursor(doc) -> str:
+    raw = json.dumps({
+        "ts": doc["timestamp"].isoformat(),
+        "id": str(doc["_id"])
+    })
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(raw["ts"]), ObjectId(raw["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(cursor: str):
+    # Rows strictly after the cursor in (timestamp desc, _id desc) order
+    timestamp, oid = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": oid}}
+        ]
+    }
+
+
+def page_query(query: dict, cursor: str = None):
+    if not cursor:
+        return query
+    return {"$and": [query, keyset_filter(cursor)]}
+
+
+def split_page(docs, limit: int):
+    # Callers fetch limit + 1 rows; the extra one only signals another page
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1])
+
+
+async def fetch_page(collection, query: dict, limit: int, cursor: str = None,
+                     projection: dict = None):
+    docs = await collection.find(page_query(query, cursor), projection).sort(
+        PAGE_SORT
+    ).limit(limit + 1).to_list(length=limit + 1)
+
+    return split_page(docs, limit)
+
+
+def _page_key(doc):
+    return doc["timestamp"], doc["_id"]
+
+
+async def fetch_merged_page(collection, queries, limit: int, cursor: str = None,
+                            projection: dict = None):
+    # K-way merge of one keyset page per query. Each source is already in
+    # page order and shares the same cursor, so limit + 1 rows from each is
+    # enough to fill the merged page; a row matched by two sources (a
+    # transfer between a user's own accounts) is only kept once
+    pages = await asyncio.gather(*(
+        collection.find(page_query(query, cursor), projection).sort(
+            PAGE_SORT
+        ).limit(limit + 1).to_list(length=limit + 1)
+        for query in queries
+    ))
+
+    docs = []
+    seen = set()
+    for doc in heapq.merge(*pages, key=_page_key, reverse=True):
+        if doc["_id"] in seen:
+            continue
+        seen.add(doc["_id"])
+        docs.append(doc)
+        if len(docs) > limit:
+            break
+
+    return split_page(docs, limit)
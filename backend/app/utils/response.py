@@ -0,0 +1,22 @@
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _default(value):
+    # orjson already handles datetime, date and UUID natively
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    # Return an instance directly from a handler to skip jsonable_encoder;
+    # handing FastAPI a plain dict still runs it row by row
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,101 @@
+import random
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app.core.security import hash_password
+from app.services.search_service import search_fields
+from app.utils.account_number import format_account_number
+
+FIRST_NAMES = ["Aarav", "Diya", "Ishaan", "Kavya", "Rohan", "Meera", "Arjun", "Ananya", "Vikram", "Priya"]
+LAST_NAMES = ["Sharma", "Patel", "Iyer", "Reddy", "Gupta", "Nair", "Singh", "Das", "Mehta", "Rao"]
+PASSWORD = "benchmark"
+INSERT_BATCH = 5000
+# Everything the app writes, so repeated runs start from the same state
+COLLECTIONS = (
+    "users", "admins", "accounts", "transactions", "analytics", "counters",
+    "risk_profiles", "risk_holds", "bulk_requests", "ocr_jobs"
+)
+
+
+def _skewed_weights(n: int, skew: float, rng):
+    # Zipf-like: a handful of accounts (payroll, merchants) see most traffic
+    ranks = list(range(1, n + 1))
+    rng.shuffle(ranks)
+    return [1 / rank ** skew for rank in ranks]
+
+
+async def _insert_batches(collection, docs):
+    for i in range(0, len(docs), INSERT_BATCH):
+        await collection.insert_many(docs[i:i + INSERT_BATCH], ordered=False)
+
+
+async def seed(db, users: int, accounts: int, transactions: int,
+               days: int = 30, skew: float = 1.1, seed_value: int = 42):
+    rng = random.Random(seed_value)
+    for name in COLLECTIONS:
+        await db[name].delete_many({})
+
+    # One hash for everyone; bcrypt per user would dominate seeding time
+    password = hash_password(PASSWORD)
+
+    user_docs = []
+    for i in range(users):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        user_docs.append({
+            "_id": ObjectId(),
+            "email": f"user{i}@bench.local",
+            "password": password,
+            "name": name,
+            "role": "user",
+            "kyc_completed": True,
+            **search_fields(name)
+        })
+    await _insert_batches(db.users, user_docs)
+
+    admin = {
+        "_id": ObjectId(),
+        "email": "admin@bench.local",
+        "password": password,
+        "name": "Bench Admin",
+        "role": "admin"
+    }
+    await db.admins.insert_one(admin)
+
+    # Every user gets one account; the remainder go to random users
+    owners = [u["_id"] for u in user_docs]
+    owners += [rng.choice(owners) for _ in range(max(accounts - users, 0))]
+    account_docs = [
+        {
+            "user_id": owner,
+            "account_number": format_account_number(seq),
+            "account_type": "current",
+            "balance": 10_000_000,
+            "daily_limit": 10_000_000,
+            "is_active": True,
+            "spent_today": 0,
+            "spend_date": None
+        }
+        for seq, owner in enumerate(owners)
+    ]
+    await _insert_batches(db.accounts, account_docs)
+    await db.counters.insert_one({"_id": "account_number", "value": len(account_docs)})
+
+    numbers = [a["account_number"] for a in account_docs]
+    weights = _skewed_weights(len(numbers), skew, rng)
+    now = datetime.utcnow()
+    ledger = []
+    for _ in range(transactions):
+        sender, receiver = rng.choices(numbers, weights=weights, k=2)
+        ledger.append({
+            "from_account": sender,
+            "to_account": receiver,
+            "amount": round(rng.lognormvariate(6, 1.2), 2),
+            "timestamp": now - timedelta(seconds=rng.uniform(0, days * 86400))
+        })
+    await _insert_batches(db.transactions, ledger)
+
+    return {
+        "users": user_docs,
+        "admin": admin,
+        "accounts": account_docs,
+        "weights": weights
+    }
@@ -0,0 +1,82 @@
+# Startup import profile for the API. From backend/:
+#
+#     python -m benchmarks.import_time
+#     python -m benchmarks.import_time --budget-ms 600
+#
+# Reports how long importing app.main takes on top of a baseline import of
+# the framework it is built on, which varies a lot from run to run and
+# machine to machine. Informational unless --budget-ms is given, which
+# bounds the app's own share. tests/test_import_time.py enforces that
+# none of FORBIDDEN is loaded at startup.
+import argparse
+import os
+import subprocess
+import sys
+
+FORBIDDEN = ("cv2", "numpy", "pytesseract", "PIL")
+BASELINE = "import fastapi, motor.motor_asyncio, pydantic_settings, pymongo"
+
+ENV = {
+    "PROJECT_NAME": "SmartBank import check",
+    "MONGO_URI": "mongodb://localhost:27017",
+    "DATABASE_NAME": "smartbank_import_check",
+    "JWT_SECRET": "import-check",
+    "JWT_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "BANK_ADMIN_SECRET": "import-check",
+}
+
+
+def measure(statement: str = "import app.main"):
+    # -X importtime writes "import time: self | cumulative | name" to stderr
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env={**os.environ, **ENV},
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+
+def _top_level_total(modules, statement: str):
+    names = statement.replace("import ", "").split(",")
+    return sum(modules.get(name.strip(), 0) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="app.main import-time profile")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if app.main costs more than this over the baseline")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = _top_level_total(measure(BASELINE), BASELINE)
+    modules = measure()
+    total = modules.get("app.main", 0)
+    own = total - baseline
+
+    print(f"app.main imported in {total:.1f}ms; baseline {baseline:.1f}ms; app's share {own:.1f}ms")
+    for name, ms in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {ms:8.1f}ms  {name}")
+
+    loaded = {name.split(".")[0] for name in modules}
+    heavy = sorted(loaded & set(FORBIDDEN))
+    if heavy:
+        print(f"note: heavy modules on the startup path: {', '.join(heavy)}")
+
+    if args.budget_ms is not None and own > args.budget_ms:
+        print(f"FAIL: app's share over the {args.budget_ms:.0f}ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
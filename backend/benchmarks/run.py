@@ -0,0 +1,218 @@
+# Load benchmark for the hot endpoints. From backend/:
+#
+#     python -m benchmarks.run --mongo-uri mongodb://localhost:27017/?replicaSet=rs0
+#     python -m benchmarks.run --fake --scenarios history,dashboard,search
+#     python -m benchmarks.run --compare before.json after.json
+#
+# Transfers need a replica set (they run in a transaction) and pipeline
+# updates, so the in-process fake only covers the read scenarios.
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("PROJECT_NAME", "SmartBank benchmark")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "smartbank_bench")
+os.environ.setdefault("JWT_SECRET", "benchmark")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "600")
+os.environ.setdefault("BANK_ADMIN_SECRET", "benchmark")
+
+from app.core.security import create_access_token
+from app.db.indexes import ensure_indexes
+from app.db.mongodb import get_db, get_read_db
+from app.main import app
+from benchmarks.dataset import seed
+
+SCENARIOS = ["transfer", "history", "dashboard", "search"]
+
+
+def _connect(args):
+    if args.fake:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--fake needs mongomock-motor (pip install -r benchmarks/requirements.txt)")
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(args.mongo_uri)
+    return client[args.database]
+
+
+def _request_factory(data, rng):
+    users = data["users"]
+    accounts = data["accounts"]
+    weights = data["weights"]
+    tokens = {}
+
+    def token(user):
+        if user["_id"] not in tokens:
+            tokens[user["_id"]] = create_access_token({"sub": user["email"], "role": "user"})
+        return tokens[user["_id"]]
+
+    admin_token = create_access_token({"sub": str(data["admin"]["_id"]), "role": "admin"})
+
+    def make(scenario):
+        user = rng.choice(users)
+        headers = {"Authorization": f"Bearer {token(user)}"}
+
+        if scenario == "transfer":
+            receiver = rng.choices(accounts, weights=weights)[0]["account_number"]
+            return "POST", "/transaction/transfer", headers, {
+                "to_account_number": receiver,
+                "amount": round(rng.uniform(1, 500), 2)
+            }
+        if scenario == "history":
+            return "GET", "/transaction/history", headers, None
+        if scenario == "dashboard":
+            return "GET", "/user/dashboard", headers, None
+
+        # Admin search by the first letters of a real name
+        prefix = rng.choice(users)["name"][:rng.randint(2, 5)]
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        return "GET", f"/admin/search?query={prefix}", headers, None
+
+    return make
+
+
+def _percentile(sorted_values, pct: float):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _drive(client, make, scenario: str, requests: int, concurrency: int):
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, url, headers, body = make(scenario)
+            started = time.perf_counter()
+            response = await client.request(method, url, headers=headers, json=body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+    }
+
+
+async def run(args):
+    import httpx
+
+    db = _connect(args)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_read_db] = lambda: db
+    if not args.fake:
+        # mongomock plans nothing with indexes and ignores
+        # partialFilterExpression, so the partial unique ledger index
+        # would reject every row without an Idempotency-Key
+        await ensure_indexes(db)
+
+    data = await seed(
+        db,
+        users=args.users,
+        accounts=args.accounts,
+        transactions=args.transactions,
+        skew=args.skew,
+        seed_value=args.seed
+    )
+    make = _request_factory(data, random.Random(args.seed))
+
+    transport = httpx.ASGITransport(app=app)
+    results = {
+        "dataset": {
+            "users": args.users,
+            "accounts": args.accounts,
+            "transactions": args.transactions,
+            "skew": args.skew,
+            "backend": "fake" if args.fake else "mongod"
+        },
+        "endpoints": {}
+    }
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scenario in args.scenarios:
+            # Warm caches and connection pools before measuring
+            await _drive(client, make, scenario, min(50, args.requests), args.concurrency)
+            results["endpoints"][scenario] = await _drive(
+                client, make, scenario, args.requests, args.concurrency
+            )
+
+    return results
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as f:
+        before = json.load(f)["endpoints"]
+    with open(after_path) as f:
+        after = json.load(f)["endpoints"]
+
+    report = {}
+    for scenario in sorted(before.keys() & after.keys()):
+        report[scenario] = {
+            metric: {
+                "before": before[scenario][metric],
+                "after": after[scenario][metric],
+                "change_pct": round(
+                    (after[scenario][metric] - before[scenario][metric])
+                    / before[scenario][metric] * 100, 1
+                ) if before[scenario][metric] else None
+            }
+            for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SmartBank endpoint benchmark")
+    parser.add_argument("--mongo-uri", default=os.environ["MONGO_URI"])
+    parser.add_argument("--database", default="smartbank_bench")
+    parser.add_argument("--fake", action="store_true", help="use in-process mongomock-motor")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--accounts", type=int, default=1200)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        type=lambda value: value.split(","))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write results JSON here as well as stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        print(json.dumps(compare(*args.compare), indent=2))
+        return
+
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Serialization cost of a large history payload, default FastAPI path vs
+# FastJSONResponse. From backend/:
+#
+#     python -m benchmarks.serialization --rows 50000
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.utils.response import FastJSONResponse
+
+
+def _rows(n: int):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    return [
+        {
+            "from_name": "Aarav Sharma",
+            "from_account": f"SBK{rng.randrange(10 ** 9):09d}",
+            "to_name": "Diya Patel",
+            "to_account": f"SBK{rng.randrange(10 ** 9):09d}",
+            "amount": round(rng.uniform(1, 50000), 2),
+            "type": "transfer",
+            "time": now - timedelta(seconds=i)
+        }
+        for i in range(n)
+    ]
+
+
+def _best_of(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    content = {"items": _rows(args.rows), "next_cursor": None}
+
+    # What FastAPI does for a returned dict: encode every value, then dump
+    before = _best_of(lambda: JSONResponse(jsonable_encoder(content)), args.repeat)
+    after = _best_of(lambda: FastJSONResponse(content), args.repeat)
+
+    print(json.dumps({
+        "rows": args.rows,
+        "jsonable_encoder_ms": round(before, 1),
+        "fast_json_ms": round(after, 1),
+        "speedup": round(before / after, 1)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
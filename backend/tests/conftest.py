@@ -0,0 +1,10 @@
+import os
+
+# Settings has required fields; the unit tests never connect anywhere
+os.environ.setdefault("PROJECT_NAME", "SmartBank tests")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DATABASE_NAME", "smartbank_test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "5")
+os.environ.setdefault("BANK_ADMIN_SECRET", "test")
@@ -0,0 +1,24 @@
+from app.utils.account_number import (
+    format_account_number,
+    is_valid_account_number,
+    luhn_check_digit,
+)
+
+
+def test_luhn_check_digit_known_value():
+    # 7992739871 is the textbook Luhn example with check digit 3
+    assert luhn_check_digit("7992739871") == "3"
+
+
+def test_formatted_numbers_validate():
+    for sequence in (0, 1, 42, 99999999):
+        number = format_account_number(sequence)
+        assert number.startswith("SBK") and len(number) == 12
+        assert is_valid_account_number(number)
+
+
+def test_single_digit_typo_is_caught():
+    number = format_account_number(12345678)
+    digit = int(number[5])
+    typo = number[:5] + str((digit + 1) % 10) + number[6:]
+    assert not is_valid_account_number(typo)
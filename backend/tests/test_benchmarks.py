@@ -0,0 +1,28 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def test_fake_benchmark_runs_end_to_end():
+    pytest.importorskip("mongomock_motor")
+    pytest.importorskip("httpx")
+
+    result = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.run", "--fake",
+            "--users", "10", "--accounts", "12", "--transactions", "50",
+            "--requests", "5", "--concurrency", "2",
+            "--scenarios", "history,dashboard,search"
+        ],
+        cwd=BACKEND, capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, result.stderr
+
+    report = json.loads(result.stdout)
+    for scenario in ("history", "dashboard", "search"):
+        assert report["endpoints"][scenario]["errors"] == 0
@@ -0,0 +1,68 @@
+import asyncio
+
+from pymongo.errors import OperationFailure
+
+from app.db import change_streams
+from app.db.change_streams import watch_forever
+
+
+class FakeStream:
+    def __init__(self, changes):
+        self.changes = changes
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.changes:
+            # Stay open like a live stream with nothing new
+            await asyncio.Event().wait()
+        change = self.changes.pop(0)
+        if isinstance(change, Exception):
+            raise change
+        self.resume_token = {"_data": change["n"]}
+        return change
+
+
+class FakeCollection:
+    name = "users"
+
+    def __init__(self, streams):
+        self.streams = streams
+        self.resumed_from = []
+
+    def watch(self, pipeline, resume_after=None, **kwargs):
+        self.resumed_from.append(resume_after)
+        return FakeStream(self.streams.pop(0))
+
+
+def test_watch_resumes_after_errors(monkeypatch):
+    monkeypatch.setattr(change_streams, "RETRY_INITIAL_SECONDS", 0)
+    collection = FakeCollection([
+        [{"n": 1}, OperationFailure("primary stepped down", code=189)],
+        [{"n": 2}, OperationFailure("history lost", code=286)],
+        [{"n": 3}],
+    ])
+    seen, gaps = [], []
+
+    async def run():
+        task = asyncio.create_task(
+            watch_forever(collection, [], lambda c: seen.append(c["n"]), lambda: gaps.append(1))
+        )
+        while len(seen) < 3:
+            await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(run())
+    assert seen == [1, 2, 3]
+    # Resumed from the last processed token, then started fresh once the
+    # token could no longer be used, reporting the gap
+    assert collection.resumed_from == [None, {"_data": 1}, None]
+    assert gaps == [1]
@@ -0,0 +1,42 @@
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+from app.schemas.transaction import TransactionFilters
+from app.services.history_service import compile_filters, filtered_totals
+
+
+def _ledger():
+    day = datetime(2026, 3, 1, 12, 0)
+    return [
+        {"from_account": "X", "to_account": "A", "amount": 500.0, "timestamp": day},
+        {"from_account": "X", "to_account": "A", "amount": 20.0, "timestamp": day},
+        {"from_account": "A", "to_account": "Y", "amount": 300.0, "timestamp": day},
+        {"from_account": "A", "to_account": "Y", "amount": 5.0, "timestamp": day},
+        {"from_account": "X", "to_account": "Y", "amount": 900.0, "timestamp": day},
+        {"from_account": "X", "to_account": "A", "amount": 700.0,
+         "timestamp": datetime(2026, 4, 1)},
+    ]
+
+
+def test_totals_follow_the_list_filters():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+
+    async def totals(**filters):
+        db = mongomock_motor.AsyncMongoMockClient()["history"]
+        await db.transactions.insert_many(_ledger())
+        query = compile_filters(TransactionFilters(**filters), "A")
+        return await filtered_totals(db, query, "A")
+
+    march = {"start": date(2026, 3, 1), "end": date(2026, 3, 31)}
+    assert asyncio.run(totals(**march)) == {
+        "count": 4, "total_credit": 520.0, "total_debit": 305.0, "net_flow": 215.0
+    }
+    assert asyncio.run(totals(min_amount=100, **march)) == {
+        "count": 2, "total_credit": 500.0, "total_debit": 300.0, "net_flow": 200.0
+    }
+    assert asyncio.run(totals(direction="debit", **march))["total_credit"] == 0
+    assert asyncio.run(totals(min_amount=10_000)) == {
+        "count": 0, "total_credit": 0, "total_debit": 0, "net_flow": 0
+    }
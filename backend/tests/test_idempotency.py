@@ -0,0 +1,34 @@
+import pytest
+from fastapi import HTTPException
+
+from app.schemas.transaction import BulkTransferRow
+from app.services.transaction_service import bulk_request_hash, check_replay
+
+ORIGINAL = {"from_account": "111", "to_account": "222", "amount": 500.0}
+
+
+def test_matching_retry_returns_original():
+    assert check_replay(ORIGINAL, "222", 500.0) is ORIGINAL
+    assert check_replay(ORIGINAL, "222", 500.0, "111") is ORIGINAL
+
+
+@pytest.mark.parametrize("to_account, amount, from_account", [
+    ("333", 500.0, None),
+    ("222", 501.0, None),
+    ("222", 500.0, "999"),
+])
+def test_reused_key_for_other_request_is_rejected(to_account, amount, from_account):
+    with pytest.raises(HTTPException) as exc:
+        check_replay(ORIGINAL, to_account, amount, from_account)
+    assert exc.value.status_code == 422
+
+
+def test_bulk_request_hash_covers_rows_mode_and_source():
+    rows = [BulkTransferRow(to_account_number="222", amount=100.0),
+            BulkTransferRow(to_account_number="333", amount=50.0)]
+    base = bulk_request_hash(rows, "atomic")
+
+    assert bulk_request_hash(list(rows), "atomic") == base
+    assert bulk_request_hash(rows[::-1], "atomic") != base
+    assert bulk_request_hash(rows, "best_effort") != base
+    assert bulk_request_hash(rows, "atomic", "111") != base
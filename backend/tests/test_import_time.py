@@ -0,0 +1,24 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.import_time import ENV, FORBIDDEN
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def test_startup_does_not_import_heavy_modules():
+    # A fresh interpreter, so modules other tests imported don't count
+    result = subprocess.run(
+        [
+            sys.executable, "-c",
+            "import json, sys, app.main; "
+            f"print(json.dumps(sorted(m for m in {list(FORBIDDEN)!r} if m in sys.modules)))"
+        ],
+        cwd=BACKEND, env={**os.environ, **ENV},
+        capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout) == []
@@ -0,0 +1,25 @@
+import json
+import logging
+import queue
+
+from app.core.logging import JsonFormatter, LocalQueueHandler
+
+
+def test_record_crosses_queue_unformatted():
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("tests.queue")
+    logger.addHandler(LocalQueueHandler(log_queue))
+    logger.propagate = False
+
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logger.exception("failed %s", "transfer")
+
+    record = log_queue.get_nowait()
+    assert record.exc_info is not None
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "failed transfer"
+    assert "ZeroDivisionError" in entry["exc_info"]
+    assert "Traceback" not in entry["message"]
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.utils.pagination import (
+    decode_cursor,
+    encode_cursor,
+    fetch_merged_page,
+    split_page,
+)
+
+START = datetime(2026, 1, 1)
+
+
+def test_cursor_round_trip():
+    doc = {"timestamp": START, "_id": ObjectId()}
+    assert decode_cursor(encode_cursor(doc)) == (START, doc["_id"])
+
+
+def test_split_page_only_emits_cursor_when_more_rows_exist():
+    docs = [{"timestamp": START, "_id": ObjectId()} for _ in range(3)]
+    assert split_page(docs, 3) == (docs, None)
+
+    page, cursor = split_page(docs, 2)
+    assert page == docs[:2]
+    assert decode_cursor(cursor) == (START, docs[1]["_id"])
+
+
+class FakeCursor:
+    # Just enough of a Motor cursor for fetch_merged_page: the query is one
+    # {"$or": [{"from_account": n}, {"to_account": n}]}, optionally behind a
+    # keyset {"$and": [...]}
+    def __init__(self, rows, query):
+        self.rows = rows
+        self.query = query
+
+    def sort(self, _):
+        return self
+
+    def limit(self, n):
+        self.n = n
+        return self
+
+    async def to_list(self, length):
+        query, after = self.query, None
+        if "$and" in query:
+            query, keyset = query["$and"]
+            after = keyset["$or"][1]
+        number = query["$or"][0]["from_account"]
+        rows = [
+            r for r in self.rows
+            if number in (r["from_account"], r["to_account"])
+            and (after is None or (r["timestamp"], r["_id"]) < (after["timestamp"], after["_id"]["$lt"]))
+        ]
+        rows.sort(key=lambda r: (r["timestamp"], r["_id"]), reverse=True)
+        return rows[:self.n]
+
+
+class FakeCollection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def find(self, query, projection=None):
+        return FakeCursor(self.rows, query)
+
+
+def _ledger():
+    rows = []
+    for i in range(10):
+        # A and B are the user's accounts; every third row moves money
+        # between them and must only appear once
+        pair = [("A", "X"), ("Y", "B"), ("A", "B")][i % 3]
+        rows.append({
+            "_id": ObjectId(),
+            "from_account": pair[0],
+            "to_account": pair[1],
+            "timestamp": START + timedelta(minutes=i)
+        })
+    return rows
+
+
+def test_merged_pages_cover_every_row_once_in_order():
+    rows = _ledger()
+    collection = FakeCollection(rows)
+    queries = [
+        {"$or": [{"from_account": n}, {"to_account": n}]}
+        for n in ("A", "B")
+    ]
+
+    async def walk():
+        seen, cursor = [], None
+        while True:
+            page, cursor = await fetch_merged_page(collection, queries, 3, cursor)
+            seen += page
+            if not cursor:
+                return seen
+
+    seen = asyncio.run(walk())
+    assert [r["_id"] for r in seen] == [
+        r["_id"] for r in sorted(rows, key=lambda r: r["timestamp"], reverse=True)
+    ]
@@ -0,0 +1,40 @@
+from bson import ObjectId
+
+from app.core import dependencies
+from app.core.cache import TTLCache
+
+
+def test_ttl_cache_reports_evictions():
+    evicted = []
+    cache = TTLCache(maxsize=2, ttl=60, on_evict=lambda k, v: evicted.append(k))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert evicted == ["b"]
+
+    cache.ttl = -1
+    cache.set("d", 4)
+    assert cache.get("d") is None
+    assert evicted == ["b", "a", "d"]
+
+
+def test_key_index_follows_principal_cache(monkeypatch):
+    monkeypatch.setattr(dependencies.principal_cache, "maxsize", 2)
+    dependencies.clear_principals()
+
+    users = [{"_id": ObjectId(), "email": f"u{i}@x"} for i in range(3)]
+    for user in users:
+        key = ("user", user["email"])
+        dependencies._principal_keys[str(user["_id"])] = key
+        dependencies.principal_cache.set(key, user)
+
+    # The oldest principal was pushed out and took its index entry with it
+    assert str(users[0]["_id"]) not in dependencies._principal_keys
+    assert len(dependencies._principal_keys) == len(dependencies.principal_cache) == 2
+
+    dependencies.invalidate_principal(users[2]["_id"])
+    assert dependencies.principal_cache.get(("user", "u2@x")) is None
+    assert len(dependencies._principal_keys) == len(dependencies.principal_cache) == 1
+
+    dependencies.clear_principals()
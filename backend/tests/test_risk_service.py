@@ -0,0 +1,116 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.services.risk_service import MIN_HISTORY, advance, new_profile, score
+
+START = datetime(2026, 1, 1)
+
+
+def build(amounts, payees=None, every=timedelta(days=1)):
+    profile = new_profile("ACC")
+    for i, amount in enumerate(amounts):
+        payee = payees[i % len(payees)] if payees else "PAYEE"
+        advance(profile, amount, payee, START + i * every)
+    return profile, START + len(amounts) * every
+
+
+def test_thin_profile_is_not_scored():
+    profile, now = build([1000] * (MIN_HISTORY - 1))
+    assert score(profile, 50000, "STRANGER", now) == 0.0
+
+
+def test_small_change_to_known_payee_is_clean():
+    profile, now = build([1000] * 30)
+    assert score(profile, 1010, "PAYEE", now) < settings.RISK_FLAG_THRESHOLD
+
+
+def test_larger_payment_to_new_payee_is_flagged_not_held():
+    random.seed(7)
+    profile, now = build(
+        [random.uniform(500, 1500) for _ in range(30)],
+        payees=[f"P{i}" for i in range(5)]
+    )
+    risk = score(profile, 5000, "STRANGER", now)
+    assert settings.RISK_FLAG_THRESHOLD <= risk < settings.RISK_HOLD_THRESHOLD
+
+
+def test_order_of_magnitude_jump_reaches_hold():
+    profile, now = build([1000] * 30)
+    assert score(profile, 100000, "STRANGER", now) >= settings.RISK_HOLD_THRESHOLD
+
+
+def test_burst_is_capped():
+    profile, now = build([1000] * 30)
+    spaced = score(profile, 1000, "PAYEE", now)
+    rushed = score(profile, 1000, "PAYEE", profile["last_at"] + timedelta(seconds=1))
+    assert 0 < rushed - spaced <= 3.0
+
+
+def test_advance_tracks_recent_counterparties():
+    profile, _ = build([100] * 40, payees=[f"P{i}" for i in range(40)])
+    assert profile["count"] == 40
+    assert profile["recent"][0] == "P39"
+    assert len(profile["recent"]) == 32
+    assert "P0" not in profile["recent"]
+
+
+def test_holds_are_off_by_default():
+    assert settings.RISK_HOLDS is False
+
+
+def test_batch_ewma_matches_incremental_mean():
+    np = pytest.importorskip("numpy")
+    from app.services.risk_service import _group_ewma
+
+    random.seed(3)
+    ledger = {
+        "A": [random.uniform(100, 5000) for _ in range(25)],
+        "B": [random.uniform(10, 200) for _ in range(7)],
+    }
+    keys = np.array([k for k, amounts in ledger.items() for _ in amounts])
+    values = np.log1p(np.array([a for amounts in ledger.values() for a in amounts]))
+
+    batch, _ = _group_ewma(values, keys)
+    for i, amounts in enumerate(ledger.values()):
+        profile, _ = build(amounts)
+        assert batch[i] == pytest.approx(profile["mean"])
+
+
+def test_rebuild_streams_whole_accounts_per_chunk(monkeypatch):
+    pytest.importorskip("numpy")
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import asyncio
+    from app.services import risk_service
+
+    random.seed(5)
+    ledger = [
+        {
+            "from_account": account,
+            "to_account": f"P{i % 4}",
+            "amount": random.uniform(10, 900),
+            "timestamp": START + timedelta(hours=i)
+        }
+        for account, n in (("A", 23), ("B", 3), ("C", 30), ("D", 1))
+        for i in range(n)
+    ]
+
+    async def rebuild(batch_rows):
+        saved = []
+
+        async def save_profiles(db, profiles, session=None):
+            saved.extend(profiles)
+
+        monkeypatch.setattr(risk_service, "REBUILD_BATCH_ROWS", batch_rows)
+        monkeypatch.setattr(risk_service, "save_profiles", save_profiles)
+        db = mongomock_motor.AsyncMongoMockClient()["risk"]
+        await db.transactions.insert_many([dict(row) for row in ledger])
+        return await risk_service.rebuild_profiles(db), saved
+
+    whole = asyncio.run(rebuild(10_000))
+    assert whole[0] == 4
+    # Chunks smaller than one account still never split an account
+    assert asyncio.run(rebuild(5)) == whole
+    assert asyncio.run(rebuild(1)) == whole
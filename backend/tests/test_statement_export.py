@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from app.services.history_service import _format_rows, _statement_row, csv_safe
+
+
+def test_formula_prefixes_are_escaped():
+    for name in ["=HYPERLINK(\"x\")", "+1", "-2+3", "@SUM(A1)", "\tcmd"]:
+        assert csv_safe(name) == "'" + name
+    assert csv_safe("Asha Rao") == "Asha Rao"
+    assert csv_safe(-250.0) == -250.0
+
+
+def test_csv_statement_escapes_counterparty_name():
+    tx = {
+        "from_account": "111",
+        "to_account": "222",
+        "amount": 500.0,
+        "timestamp": datetime(2026, 1, 2, 10, 0)
+    }
+    row = _statement_row(tx, "111", {"222": "=cmd|' /C calc'!A0"})
+
+    csv_text = _format_rows([row], "csv")
+    assert "'=cmd" in csv_text
+    assert _format_rows([row], "ndjson").startswith(b'{"time"')
+    assert b"'=cmd" not in _format_rows([row], "ndjson")
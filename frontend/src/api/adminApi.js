@@ -3,8 +3,18 @@ import api from "./axios";
 export const searchAdminUser = (query) =>
   api.get(`/admin/search`, { params: { query } });
 
-export const getUserByAccount = (accountNumber) =>
-  api.get(`/admin/user/${accountNumber}`);
+export const getUserByAccount = (accountNumber, params = {}) =>
+  api.get(`/admin/user/${accountNumber}`, { params });
+
+export const countUserTransactions = (accountNumber, params = {}) =>
+  api.get(`/admin/user/${accountNumber}`, {
+    params: { ...params, count_only: true },
+  });
+
+export const getAccountAnalytics = (accountNumber, start, end) =>
+  api.get(`/admin/analytics`, {
+    params: { account_number: accountNumber, start, end },
+  });
 
 export const updateDailyLimit = (accountNumber, newLimit) =>
   api.patch(`/admin/account/limit`, {
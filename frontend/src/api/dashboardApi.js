@@ -3,3 +3,12 @@ import api from "./axios";
 export const getDashboard = () => {
   return api.get("/user/dashboard");
 };
+
+export const openAccountEvents = async () => {
+  // EventSource cannot send an Authorization header, and a URL ends up in
+  // logs, so it carries a short-lived ticket instead of the access token
+  const res = await api.post("/user/events/ticket");
+  return new EventSource(
+    `${import.meta.env.VITE_API_URL}/user/events?ticket=${encodeURIComponent(res.data.ticket)}`
+  );
+};
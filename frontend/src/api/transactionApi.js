@@ -1,12 +1,13 @@
 import api from "./axios";
 
-export const transferMoney = (toAccount, amount) => {
+export const transferMoney = (toAccount, amount, fromAccount) => {
   return api.post("/transaction/transfer", {
     to_account_number: toAccount,
     amount: Number(amount),
+    from_account_number: fromAccount || undefined,
   });
 };
 
-export const getTransactionHistory = () => {
-  return api.get("/transaction/history");
+export const getTransactionHistory = (cursor, limit = 20) => {
+  return api.get("/transaction/history", { params: { cursor, limit } });
 };
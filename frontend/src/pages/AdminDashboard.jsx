@@ -1,8 +1,9 @@
-import { useState, useContext } from "react";
+import { useState, useContext, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import {
   searchAdminUser,
   getUserByAccount,
+  countUserTransactions,
   updateDailyLimit,
   deactivateAccount,
 } from "../api/adminApi";
@@ -12,6 +13,14 @@ export default function AdminDashboard() {
   const [query, setQuery] = useState("");
   const [results, setResults] = useState([]);
   const [selectedUser, setSelectedUser] = useState(null);
+  const [transactions, setTransactions] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [summary, setSummary] = useState({
+    total_credit: 0,
+    total_debit: 0,
+    net_flow: 0,
+  });
+  const [txCount, setTxCount] = useState(0);
   const [newLimit, setNewLimit] = useState("");
   const [error, setError] = useState("");
   const [message, setMessage] = useState("");
@@ -44,7 +53,7 @@ export default function AdminDashboard() {
 
     try {
       const res = await searchAdminUser(query);
-      const data = Array.isArray(res.data) ? res.data : [res.data];
+      const data = res.data.items;
       setResults(data);
 
       if (data.length === 1) {
@@ -58,7 +67,8 @@ export default function AdminDashboard() {
 
   const loadUserDetails = async (accountNumber) => {
     try {
-      const res = await getUserByAccount(accountNumber);
+      // The first page of transactions is loaded by the filter effect below
+      const res = await getUserByAccount(accountNumber, { limit: 1 });
       setSelectedUser(res.data);
       setNewLimit(res.data.account.daily_limit);
     } catch {
@@ -66,6 +76,53 @@ export default function AdminDashboard() {
     }
   };
 
+  /* ===================== FILTERED TRANSACTIONS + ANALYTICS ===================== */
+  const accountNumber = selectedUser?.account.account_number;
+
+  // Filtering, counting and totals all happen on the server; the list is
+  // paged, so nothing here may be computed from the rows loaded so far
+  const filterParams = () => ({
+    direction: txType === "all" ? undefined : txType,
+    start: fromDate || undefined,
+    end: toDate || undefined,
+    min_amount: minAmount || undefined,
+  });
+
+  const loadTransactions = async (cursor) => {
+    try {
+      const res = await getUserByAccount(accountNumber, {
+        ...filterParams(),
+        cursor,
+      });
+      setTransactions((prev) =>
+        cursor ? [...prev, ...res.data.transactions] : res.data.transactions
+      );
+      setNextCursor(res.data.next_cursor);
+    } catch {
+      setError("Failed to load transactions");
+    }
+  };
+
+  const loadSummary = async () => {
+    try {
+      // Count and totals come back together under the same filters as the list
+      const res = await countUserTransactions(accountNumber, filterParams());
+      const { count, ...totals } = res.data;
+      setSummary(totals);
+      setTxCount(count);
+    } catch {
+      setError("Failed to load account analytics");
+    }
+  };
+
+  useEffect(() => {
+    if (!accountNumber) return;
+    loadTransactions(null);
+    loadSummary();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [accountNumber, txType, fromDate, toDate, minAmount]);
+
+
   /* ===================== ADMIN ACTIONS ===================== */
   const handleLimitUpdate = async () => {
     try {
@@ -88,33 +145,6 @@ export default function AdminDashboard() {
     }
   };
 
-  /* ===================== FILTERED TRANSACTIONS + ANALYTICS ===================== */
-  let totalCredit = 0;
-  let totalDebit = 0;
-  let txCount = 0;
-
-  const filteredTx =
-    selectedUser?.transactions.filter((tx) => {
-      const acc = selectedUser.account.account_number;
-      const isDebit = tx.from_account === acc;
-      const isCredit = tx.to_account === acc;
-
-      if (txType === "debit" && !isDebit) return false;
-      if (txType === "credit" && !isCredit) return false;
-
-      const txDate = new Date(tx.time);
-      if (fromDate && txDate < new Date(fromDate)) return false;
-      if (toDate && txDate > new Date(toDate + "T23:59:59")) return false;
-
-      if (minAmount && tx.amount < Number(minAmount)) return false;
-
-      if (isDebit) totalDebit += tx.amount;
-      if (isCredit) totalCredit += tx.amount;
-      txCount++;
-
-      return true;
-    }) || [];
-
   /* ===================== UI ===================== */
   return (
     <div className="min-h-screen bg-[#0b0f14] text-gray-200 p-6">
@@ -231,12 +261,12 @@ export default function AdminDashboard() {
 
           {/* SUMMARY */}
           <div className="grid grid-cols-1 md:grid-cols-4 gap-6 mb-6">
-            <Summary title="Total Credit" value={totalCredit} color="green" />
-            <Summary title="Total Debit" value={totalDebit} color="red" />
+            <Summary title="Total Credit" value={summary.total_credit} color="green" />
+            <Summary title="Total Debit" value={summary.total_debit} color="red" />
             <Summary
               title="Net Flow"
-              value={totalCredit - totalDebit}
-              color={totalCredit - totalDebit >= 0 ? "green" : "red"}
+              value={summary.net_flow}
+              color={summary.net_flow >= 0 ? "green" : "red"}
             />
             <Summary
               title="Transactions"
@@ -283,7 +313,7 @@ export default function AdminDashboard() {
             <h3 className="text-yellow-400 font-semibold mb-4">
               Transaction History
             </h3>
-            {filteredTx.map((tx, i) => {
+            {transactions.map((tx, i) => {
               const isDebit =
                 tx.from_account === selectedUser.account.account_number;
               return (
@@ -314,6 +344,14 @@ export default function AdminDashboard() {
                 </div>
               );
             })}
+            {nextCursor && (
+              <button
+                onClick={() => loadTransactions(nextCursor)}
+                className="mt-2 bg-yellow-400 text-black px-4 py-2 rounded-md font-semibold"
+              >
+                Load more
+              </button>
+            )}
           </div>
         </>
       )}
@@ -1,18 +1,22 @@
-import { useEffect, useState, useContext } from "react";
+import { useEffect, useState, useContext, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import { AuthContext } from "../context/authContext";
-import { getDashboard } from "../api/dashboardApi";
+import { getDashboard, openAccountEvents } from "../api/dashboardApi";
 import { transferMoney, getTransactionHistory } from "../api/transactionApi";
 
 export default function Dashboard() {
   const [userData, setUserData] = useState(null);
   const [history, setHistory] = useState([]);
+  const [fromAccount, setFromAccount] = useState("");
   const [toAccount, setToAccount] = useState("");
   const [amount, setAmount] = useState("");
   const [error, setError] = useState("");
   const [message, setMessage] = useState("");
   const [loading, setLoading] = useState(false);
 
+  const ownAccounts = useRef(new Set());
+  const historyRef = useRef([]);
+
   const { logout } = useContext(AuthContext);
   const navigate = useNavigate();
 
@@ -20,6 +24,10 @@ export default function Dashboard() {
     try {
       const res = await getDashboard();
       setUserData(res.data);
+      setFromAccount((prev) => prev || res.data.account?.account_number || "");
+      ownAccounts.current = new Set(
+        res.data.accounts.map((acc) => acc.account_number)
+      );
     } catch {
       setError("Failed to load dashboard");
     }
@@ -28,7 +36,7 @@ export default function Dashboard() {
   const loadHistory = async () => {
     try {
       const res = await getTransactionHistory();
-      setHistory(res.data);
+      setHistory(res.data.items);
     } catch {
       setError("Failed to load transaction history");
     }
@@ -45,7 +53,7 @@ export default function Dashboard() {
 
     try {
       setLoading(true);
-      await transferMoney(toAccount, amount);
+      await transferMoney(toAccount, amount, fromAccount);
       setMessage("Transfer successful");
       setToAccount("");
       setAmount("");
@@ -58,6 +66,10 @@ export default function Dashboard() {
     }
   };
 
+  useEffect(() => {
+    historyRef.current = history;
+  }, [history]);
+
   const handleLogout = () => {
     logout();
     navigate("/", { replace: true });
@@ -66,6 +78,91 @@ export default function Dashboard() {
   useEffect(() => {
     loadDashboard();
     loadHistory();
+
+    // Pushed rows are added in place; only a resync refetches everything
+    const onTransaction = (e) => {
+      const tx = JSON.parse(e.data);
+      const isDebit = ownAccounts.current.has(tx.from_account);
+      let row = {
+        id: tx.id,
+        name: "Self",
+        account_number: tx.to_account,
+        amount: tx.amount,
+        type: "credit",
+        time: tx.time,
+      };
+
+      if (isDebit) {
+        const known = historyRef.current.find(
+          (prev) => prev.account_number === tx.to_account
+        );
+        if (!known) {
+          // The counterparty name is not on the event; own debits are rare
+          loadHistory();
+          return;
+        }
+        row = { ...row, name: known.name, type: "debit" };
+      }
+
+      setHistory((prev) =>
+        prev.some((r) => r.id === row.id) ? prev : [row, ...prev]
+      );
+    };
+
+    let events = null;
+    let retry = null;
+    let closed = false;
+
+    const connect = async () => {
+      try {
+        events = await openAccountEvents();
+      } catch {
+        retry = setTimeout(connect, 5000);
+        return;
+      }
+      if (closed) {
+        events.close();
+        return;
+      }
+
+      events.addEventListener("balance", (e) => {
+        const { account_number, balance } = JSON.parse(e.data);
+        setUserData((prev) => {
+          if (!prev) return prev;
+          const accounts = prev.accounts.map((acc) =>
+            acc.account_number === account_number ? { ...acc, balance } : acc
+          );
+          return {
+            ...prev,
+            accounts,
+            account:
+              prev.account?.account_number === account_number
+                ? { ...prev.account, balance }
+                : prev.account,
+            total_balance: accounts.reduce((sum, acc) => sum + acc.balance, 0),
+          };
+        });
+      });
+      events.addEventListener("transaction", onTransaction);
+      events.addEventListener("resync", () => {
+        loadDashboard();
+        loadHistory();
+      });
+      events.onerror = () => {
+        // Tickets expire, so a dropped stream reconnects with a fresh one
+        if (events.readyState === EventSource.CLOSED) {
+          retry = setTimeout(connect, 1000);
+        }
+      };
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      if (events) events.close();
+    };
   }, []);
 
   if (!userData) {
@@ -103,28 +200,34 @@ export default function Dashboard() {
         </div>
       )}
 
-      {/* ACCOUNT SUMMARY */}
-      <div className="grid grid-cols-1 md:grid-cols-3 gap-6 mb-8">
-        <div className="bg-white/5 border border-white/10 rounded-xl p-6">
-          <p className="text-gray-400 text-sm">Account Number</p>
-          <p className="text-lg font-semibold">
-            {userData.account.account_number}
-          </p>
-        </div>
-
-        <div className="bg-white/5 border border-white/10 rounded-xl p-6">
-          <p className="text-gray-400 text-sm">Account Balance</p>
-          <p className="text-2xl font-bold text-green-400">
-            ₹{userData.account.balance}
-          </p>
-        </div>
+      {/* PORTFOLIO */}
+      <div className="bg-white/5 border border-white/10 rounded-xl p-6 mb-6">
+        <p className="text-gray-400 text-sm">Total Balance</p>
+        <p className="text-2xl font-bold text-green-400">
+          ₹{userData.total_balance}
+        </p>
+      </div>
 
-        <div className="bg-white/5 border border-white/10 rounded-xl p-6">
-          <p className="text-gray-400 text-sm">Daily Limit</p>
-          <p className="text-lg font-semibold">
-            ₹{userData.account.daily_limit}
-          </p>
-        </div>
+      {/* ACCOUNTS */}
+      <div className="grid grid-cols-1 md:grid-cols-3 gap-6 mb-8">
+        {userData.accounts.map((acc) => (
+          <div
+            key={acc.account_number}
+            className="bg-white/5 border border-white/10 rounded-xl p-6"
+          >
+            <p className="text-gray-400 text-sm">
+              {acc.account_type.toUpperCase()}
+              {acc.account_number === userData.account?.account_number &&
+                " · Primary"}
+              {!acc.is_active && " · Inactive"}
+            </p>
+            <p className="text-lg font-semibold">{acc.account_number}</p>
+            <p className="text-2xl font-bold text-green-400">₹{acc.balance}</p>
+            <p className="text-sm text-gray-400">
+              Daily limit ₹{acc.daily_limit}
+            </p>
+          </div>
+        ))}
       </div>
 
       {/* TRANSFER + HISTORY */}
@@ -135,6 +238,22 @@ export default function Dashboard() {
             Transfer Money
           </h2>
 
+          {userData.accounts.length > 1 && (
+            <select
+              value={fromAccount}
+              onChange={(e) => setFromAccount(e.target.value)}
+              className="w-full bg-[#0b0f14] border border-white/20 rounded-md px-4 py-2 mb-3 outline-none focus:border-yellow-400"
+            >
+              {userData.accounts
+                .filter((acc) => acc.is_active && acc.account_type !== "fd")
+                .map((acc) => (
+                  <option key={acc.account_number} value={acc.account_number}>
+                    From {acc.account_type} {acc.account_number} (₹{acc.balance})
+                  </option>
+                ))}
+            </select>
+          )}
+
           <input
             placeholder="Receiver Account Number"
             value={toAccount}
@@ -171,7 +290,7 @@ export default function Dashboard() {
             <div className="space-y-3 max-h-[400px] overflow-y-auto pr-2">
               {history.map((tx, index) => (
                 <div
-                  key={index}
+                  key={tx.id || index}
                   className={`border-l-4 p-3 rounded-md bg-white/5 ${
                     tx.type === "credit" ? "border-green-400" : "border-red-400"
                   }`}
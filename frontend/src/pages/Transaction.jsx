@@ -3,8 +3,11 @@ import {
   transferMoney,
   getTransactionHistory,
 } from "../api/transactionApi";
+import { getDashboard } from "../api/dashboardApi";
 
 export default function Transaction() {
+  const [accounts, setAccounts] = useState([]);
+  const [fromAccount, setFromAccount] = useState("");
   const [toAccount, setToAccount] = useState("");
   const [amount, setAmount] = useState("");
   const [history, setHistory] = useState([]);
@@ -15,7 +18,7 @@ export default function Transaction() {
   const loadHistory = async () => {
     try {
       const res = await getTransactionHistory();
-      setHistory(res.data);
+      setHistory(res.data.items);
     } catch {
       setError("Failed to load transaction history");
     }
@@ -32,7 +35,7 @@ export default function Transaction() {
 
     try {
       setLoading(true);
-      await transferMoney(toAccount, amount);
+      await transferMoney(toAccount, amount, fromAccount);
       setMessage("Transfer successful");
       setToAccount("");
       setAmount("");
@@ -46,6 +49,12 @@ export default function Transaction() {
 
   useEffect(() => {
     loadHistory();
+    getDashboard()
+      .then((res) => {
+        setAccounts(res.data.accounts);
+        setFromAccount(res.data.account?.account_number || "");
+      })
+      .catch(() => {});
   }, []);
 
   return (
@@ -55,6 +64,24 @@ export default function Transaction() {
       {error && <p style={{ color: "red" }}>{error}</p>}
       {message && <p style={{ color: "green" }}>{message}</p>}
 
+      {accounts.length > 1 && (
+        <>
+          <select
+            value={fromAccount}
+            onChange={(e) => setFromAccount(e.target.value)}
+          >
+            {accounts
+              .filter((acc) => acc.is_active && acc.account_type !== "fd")
+              .map((acc) => (
+                <option key={acc.account_number} value={acc.account_number}>
+                  {acc.account_type} - {acc.account_number} (₹{acc.balance})
+                </option>
+              ))}
+          </select>
+          <br /><br />
+        </>
+      )}
+
       <input
         placeholder="Receiver Account Number"
         value={toAccount}